@@ -0,0 +1,21 @@
+"""
+Admin authentication for maintenance endpoints.
+"""
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException
+from app.config import get_settings
+
+settings = get_settings()
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """
+    Require a valid `X-Admin-Key` header.
+    Admin endpoints are disabled entirely if no admin key is configured.
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
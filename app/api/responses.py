@@ -0,0 +1,158 @@
+"""
+Fast JSON response path for chat answers.
+
+Returning a `ChatResponse` from the endpoint makes FastAPI re-validate it
+against `response_model` (rebuilding every VisemeMark/WordMark) and then
+serialize it with the standard JSON encoder. With a large base64 MP3 and
+hundreds of marks that is a noticeable CPU cost per request. Here the
+body is written straight to bytes with orjson, static answers (intents,
+answer bank) are encoded and compressed once and reused, and the body is
+gzip/brotli compressed when the client accepts it.
+
+Base64 MP3 data only shrinks by about a quarter and dominates the
+compression time, so freshly generated answers are compressed only when
+they carry no audio; static answers are always compressed, since that
+cost is paid once.
+"""
+import gzip
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import orjson
+from fastapi import Response
+from app.api.schemas import SpeechAlignment
+from app.config import get_settings
+
+settings = get_settings()
+
+# Brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Compression levels: static bodies are compressed once, so use a higher level
+FAST_LEVELS = {"br": 4, "gzip": 4}
+STATIC_LEVELS = {"br": 9, "gzip": 9}
+
+# Encoded bodies for static answers: {(persona_id, text, audio_length): {encoding: bytes}}
+MAX_STATIC_BODIES = 256
+_static_bodies: "OrderedDict[Tuple[str, str, int], Dict[str, bytes]]" = OrderedDict()
+
+
+def encode_alignment(alignment: Optional[SpeechAlignment]) -> Optional[bytes]:
+    """Serialize alignment marks to JSON bytes without re-validating them."""
+    if alignment is None:
+        return None
+    return orjson.dumps({
+        "visemes": [{"time": mark.time, "viseme": mark.viseme} for mark in alignment.visemes],
+        "words": [{"time": mark.time, "value": mark.value} for mark in alignment.words],
+    })
+
+
+def encode_chat_response(
+    text: str,
+    audio_base64: Optional[str] = None,
+    alignment: Optional[SpeechAlignment] = None
+) -> bytes:
+    """Encode a chat answer as the JSON body of a `ChatResponse`."""
+    alignment_json = encode_alignment(alignment)
+    return orjson.dumps({
+        "text": text,
+        "audio_base64": audio_base64,
+        "alignment": orjson.Fragment(alignment_json) if alignment_json else None,
+    })
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported content encoding from an Accept-Encoding header."""
+    if not accept_encoding or not settings.response_compression:
+        return None
+
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, *params = part.strip().split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip())
+
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress a body with the given content encoding."""
+    levels = STATIC_LEVELS if static else FAST_LEVELS
+    if encoding == "br":
+        return brotli.compress(body, quality=levels["br"])
+    return gzip.compress(body, compresslevel=levels["gzip"])
+
+
+def _build_response(body: bytes, encoding: Optional[str]) -> Response:
+    """Wrap an (optionally pre-compressed) body in a JSON response."""
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def chat_json_response(
+    text: str,
+    audio_base64: Optional[str] = None,
+    alignment: Optional[SpeechAlignment] = None,
+    accept_encoding: Optional[str] = None
+) -> Response:
+    """Build the response for a freshly generated answer."""
+    body = encode_chat_response(text, audio_base64, alignment)
+    encoding = None
+    if audio_base64 is None and len(body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(accept_encoding)
+    if encoding:
+        body = compress(body, encoding)
+    return _build_response(body, encoding)
+
+
+def static_chat_json_response(
+    text: str,
+    audio_base64: Optional[str] = None,
+    alignment: Optional[SpeechAlignment] = None,
+    accept_encoding: Optional[str] = None,
+    persona_id: str = ""
+) -> Response:
+    """
+    Build the response for a static answer (intent template or answer bank).
+
+    The encoded body and each compressed variant are built once and reused
+    for every later hit on the same answer. Bodies are cached per persona,
+    since the same text is voiced differently by each.
+    """
+    key = (persona_id, text, len(audio_base64 or ""))
+    variants = _static_bodies.get(key)
+    if variants is None:
+        variants = {"identity": encode_chat_response(text, audio_base64, alignment)}
+        _static_bodies[key] = variants
+        if len(_static_bodies) > MAX_STATIC_BODIES:
+            _static_bodies.popitem(last=False)
+    else:
+        _static_bodies.move_to_end(key)
+
+    body = variants["identity"]
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if not encoding:
+        return _build_response(body, None)
+
+    if encoding not in variants:
+        variants[encoding] = compress(body, encoding, static=True)
+    return _build_response(variants[encoding], encoding)
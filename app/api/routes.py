@@ -1,56 +1,246 @@
-from fastapi import APIRouter, HTTPException
-from app.api.schemas import ChatRequest, ChatResponse
-from app.rag.pipeline import get_rag_response
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from app.config import get_settings
+from app.api.auth import require_admin
+from app.api.responses import chat_json_response, static_chat_json_response
+from app.api.schemas import ChatRequest, ChatResponse, BatchChatRequest
+from app.rag.pipeline import get_rag_response, stream_rag_response, get_persona_store_stats
+from app.rag.answer_bank import lookup_answer, reset_answer_bank, get_answer_bank_stats
+from app.rag.model_router import get_route_stats
+from app.services.chat_history import ChatHistoryManager
+from app.services.fallback import fallback_answer
+from app.services.intent_router import classify_intent, answer_intent, get_intent_stats
+from app.services.memory import fold_history
+from app.services.personas import UnknownPersonaError, get_persona, list_persona_ids, reset_persona
 from app.tts.polly import generate_speech_with_alignment
+from app.tts.pipelined import generate_speech_pipelined
 from app.utils.rate_limiter import check_rate_limit
+from app.utils.resilience import UpstreamUnavailable, get_resilience_stats
+
+settings = get_settings()
 
 router = APIRouter()
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, background_tasks: BackgroundTasks):
     """
     Chat endpoint - returns complete response with optional audio.
+    
+    The body is encoded directly (see app.api.responses) rather than
+    re-validated against `ChatResponse`, which is kept for the API docs.
+    Older turns are folded into the session summary after the response
+    has been sent.
     """
     from app.utils.timer import timer
     
-    with timer(f"Total Chat Request ({request.session_id})"):
+    accept_encoding = http_request.headers.get("accept-encoding")
+    
+    try:
+        persona = get_persona(request.persona_id)
+    except UnknownPersonaError:
+        raise HTTPException(status_code=404, detail=f"Unknown persona '{request.persona_id}'")
+    # Sessions and rate limits are namespaced per persona
+    session_id = persona.scoped_key(request.session_id)
+    if session_id:
+        background_tasks.add_task(fold_history, session_id, persona.name)
+    
+    with timer(
+        "Total Chat Request",
+        session_id=request.session_id,
+        persona=persona.id,
+        message_chars=len(request.message)
+    ) as request_span:
         # Check rate limit (simplified - would use IP in production)
-        if not check_rate_limit(request.session_id or "anonymous"):
+        with timer("Rate Limit Check"):
+            allowed = check_rate_limit(
+                persona.scoped_key(request.session_id or "anonymous"),
+                limit=persona.rate_limit_per_day
+            )
+        if not allowed:
             raise HTTPException(
                 status_code=429,
                 detail="Rate limit exceeded. Try again tomorrow!"
             )
         
         try:
-            # Get AI response
-            with timer("RAG Pipeline"):
-                text_response = await get_rag_response(request.message, request.session_id)
+            # Answer small talk from templates without touching RAG or the LLM
+            intent = await classify_intent(request.message)
+            if intent and intent in persona.intent_responses:
+                request_span.set_attribute("answer_source", f"intent:{intent}")
+                text_response, audio_base64, alignment = await answer_intent(
+                    intent, request.message, session_id, persona
+                )
+                return static_chat_json_response(
+                    text_response, audio_base64, alignment, accept_encoding, persona.id
+                )
             
-            # Generate speech with alignment (if AWS Polly is configured)
-            with timer("TTS Generation"):
-                audio_base64, alignment = await generate_speech_with_alignment(text_response)
+            # Serve common questions from the precomputed answer bank
+            if persona.answer_bank:
+                with timer("Answer Bank Lookup"):
+                    banked = await lookup_answer(request.message)
+                if banked:
+                    request_span.set_attribute("answer_source", "answer_bank")
+                    text_response, audio_base64, alignment = banked
+                    if session_id:
+                        ChatHistoryManager.add_user_message(session_id, request.message)
+                        ChatHistoryManager.add_ai_message(session_id, text_response)
+                    return static_chat_json_response(
+                        text_response, audio_base64, alignment, accept_encoding, persona.id
+                    )
             
-            return ChatResponse(
-                text=text_response,
-                audio_base64=audio_base64,
-                alignment=alignment
-            )
+            request_span.set_attribute("answer_source", "rag")
+            try:
+                if settings.tts_pipelining:
+                    # Synthesize sentences while the LLM is still generating
+                    with timer("RAG + TTS Pipelined"):
+                        text_response, audio_base64, alignment = await generate_speech_pipelined(
+                            stream_rag_response(request.message, session_id, persona),
+                            persona.voice_id
+                        )
+                else:
+                    # Get AI response
+                    with timer("RAG Pipeline"):
+                        text_response = await get_rag_response(request.message, session_id, persona)
+                    
+                    # Generate speech with alignment (text-only if Polly is unavailable)
+                    with timer("TTS Generation"):
+                        audio_base64, alignment = await generate_speech_with_alignment(
+                            text_response, persona.voice_id
+                        )
+            except UpstreamUnavailable as e:
+                # Gemini is failing, slow or its breaker is open: degrade instead of a 500
+                print(f"Answering without the LLM ({e})")
+                with timer("Fallback Answer"):
+                    text_response, audio_base64, alignment, source = await fallback_answer(
+                        request.message, persona
+                    )
+                request_span.set_attribute("answer_source", f"fallback:{source}")
+                return static_chat_json_response(
+                    text_response, audio_base64, alignment, accept_encoding, persona.id
+                )
+            
+            with timer("Encode Response") as encode_span:
+                response = chat_json_response(
+                    text_response, audio_base64, alignment, accept_encoding
+                )
+                encode_span.set_attribute("response_bytes", len(response.body))
+                return response
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.websocket("/ws/chat")
+async def chat_ws(
+    websocket: WebSocket,
+    persona_id: Optional[str] = None,
+    session_id: Optional[str] = None
+):
+    """
+    Conversational WebSocket - one connection per conversation.
+    
+    Answers are pushed as binary frames (text tokens, per-sentence audio
+    and marks) while they are generated; see app.services.conversation
+    for the frame format.
+    """
+    from app.services.conversation import ConversationChannel
+    
+    try:
+        persona = get_persona(persona_id)
+    except UnknownPersonaError:
+        await websocket.close(code=1008, reason=f"Unknown persona '{persona_id}'")
+        return
+    
+    await websocket.accept()
+    await ConversationChannel(websocket, persona, session_id).run()
+
+
+@router.post("/chat/batch", dependencies=[Depends(require_admin)])
+async def chat_batch(request: BatchChatRequest):
+    """
+    Batch chat endpoint (admin only) - for evaluation runs and cache warming.
+    
+    Streams one NDJSON line per question as each answer completes.
+    No chat history and no rate limiting.
+    """
+    from app.services.batch_chat import run_batch
+    
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="No questions provided")
+    if len(request.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many questions (max {settings.batch_max_questions})"
+        )
+    
+    try:
+        results = await run_batch(
+            request.questions,
+            include_audio=request.include_audio,
+            concurrency=request.concurrency or settings.batch_concurrency
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def ndjson():
+        async for result in results:
+            yield result.model_dump_json() + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/stats")
+async def stats():
+    """
+    Routing statistics - per-intent hit counts, answer bank size,
+    per-route LLM latency/token metrics, circuit breaker states,
+    persona counts and history tokens saved by conversation summaries.
+    """
+    return {
+        "intents": get_intent_stats(),
+        "answer_bank": get_answer_bank_stats(),
+        "llm": get_route_stats(),
+        "resilience": get_resilience_stats(),
+        "personas": {"configured": len(list_persona_ids()), **get_persona_store_stats()},
+        "memory": ChatHistoryManager.get_memory_stats(),
+    }
+
+
+@router.get("/stats/memory", dependencies=[Depends(require_admin)])
+async def memory_stats(session_id: Optional[str] = None):
+    """
+    Per-session prompt accounting (admin only, since session ids give
+    access to a conversation): history tokens sent with summaries vs the
+    raw history they replaced, and the number of folds.
+    """
+    return ChatHistoryManager.get_session_memory_stats(session_id)
+
+
 @router.post("/ingest")
-async def ingest_knowledge():
+async def ingest_knowledge(persona_id: Optional[str] = None):
     """
     Trigger knowledge base re-ingestion.
     Call this after adding new markdown files.
+    Pass `persona_id` to ingest a persona's own knowledge directory
+    (its persona.json and prompt.txt are re-read too).
+    The answer bank is reloaded and ignored if the knowledge changed;
+    rebuild it with `python -m app.rag.answer_bank`.
     """
     from app.rag.ingest import ingest_knowledge_base
     
+    if persona_id:
+        reset_persona(persona_id)
+    try:
+        persona = get_persona(persona_id)
+    except UnknownPersonaError:
+        raise HTTPException(status_code=404, detail=f"Unknown persona '{persona_id}'")
+    
     try:
-        count = await ingest_knowledge_base()
-        return {"status": "success", "documents_ingested": count}
+        count = await ingest_knowledge_base(persona)
+        if persona.answer_bank:
+            reset_answer_bank()
+        return {"status": "success", "persona_id": persona.id, "documents_ingested": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -6,6 +6,7 @@ class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str
     session_id: Optional[str] = None
+    persona_id: Optional[str] = None  # Defaults to the built-in persona
 
 
 class VisemeMark(BaseModel):
@@ -33,6 +34,24 @@ class ChatResponse(BaseModel):
     alignment: Optional[SpeechAlignment] = None
 
 
+class BatchChatRequest(BaseModel):
+    """Request model for the batch chat endpoint."""
+    questions: List[str]
+    include_audio: bool = False
+    concurrency: Optional[int] = None  # Defaults to settings.batch_concurrency
+
+
+class BatchChatResult(BaseModel):
+    """One NDJSON line of the batch chat response."""
+    index: int                          # Position of the question in the request
+    question: str
+    text: Optional[str] = None
+    audio_base64: Optional[str] = None
+    alignment: Optional[SpeechAlignment] = None
+    route: Optional[str] = None         # LLM route used (brief, standard, detailed)
+    error: Optional[str] = None
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
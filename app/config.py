@@ -14,6 +14,49 @@ class Settings(BaseSettings):
     aws_region: str = "us-east-2"
     polly_voice_id: str = "Matthew"  # Neural voice
     polly_engine: str = "neural"  # standard, neural, long-form, generative
+    # Stream the LLM and synthesize sentences while it is still generating
+    tts_pipelining: bool = False
+    polly_timeout: float = 8.0  # Seconds for audio + speech marks before answering text-only
+    polly_max_workers: int = 8  # Threads for Polly calls (boto3 is blocking)
+    polly_slow_call_ms: int = 3000  # Polly calls slower than this count against its breaker
+    
+    # LLM Routing
+    llm_primary_model: str = "gemini-2.0-flash"
+    llm_fast_model: str = "gemini-2.0-flash-lite"  # Brief answers and latency fallback
+    llm_brief_max_tokens: int = 100
+    llm_standard_max_tokens: int = 150
+    llm_detailed_max_tokens: int = 250
+    # Route primary-model traffic to the fast model while its recent p95 exceeds this (0 disables)
+    llm_latency_budget_ms: int = 4000
+    llm_timeout: float = 15.0  # Seconds for a complete answer (or between streamed chunks)
+    # Start a second identical LLM request if the first hasn't answered by then (0 disables)
+    llm_hedge_delay_ms: int = 2500
+    
+    # Circuit breakers (per upstream: each LLM model, embeddings, Polly)
+    breaker_window: int = 20  # Recent calls considered
+    breaker_min_calls: int = 5  # Calls needed before the breaker can trip
+    breaker_failure_rate: float = 0.5  # Trip when this share of recent calls failed...
+    breaker_slow_call_rate: float = 0.8  # ...or this share was slow
+    breaker_open_seconds: float = 30.0  # Cool-down before a probe call is allowed
+    # Similarity needed to serve a banked answer to a paraphrase while the LLM is unavailable
+    fallback_similarity_threshold: float = 0.8
+    
+    # gzip/brotli compression of chat responses when the client accepts it
+    response_compression: bool = True
+    
+    # Tracing: "" (off), "console" or "file" (JSON lines, see scripts/trace_waterfall.py)
+    tracing_exporter: str = ""
+    tracing_file: str = "./traces.jsonl"
+    
+    # Conversation memory: fold older exchanges into a rolling summary (fast model)
+    memory_summary: bool = True
+    memory_keep_turns: int = 3  # Recent exchanges always sent verbatim
+    memory_fold_turns: int = 2  # Fold once this many older exchanges have built up
+    memory_summary_max_tokens: int = 200
+    
+    # WebSocket conversations (/api/ws/chat)
+    ws_send_queue_size: int = 32  # Outgoing frames buffered per connection before the turn waits
+    ws_send_timeout: float = 10.0  # Seconds a full send queue is tolerated before disconnecting
     
     # CORS
     frontend_url: str = "http://localhost:5173"
@@ -21,8 +64,33 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_per_day: int = 10
     
+    # Admin endpoints (batch chat); disabled when empty
+    admin_api_key: str = ""
+    batch_concurrency: int = 4  # Parallel LLM/TTS calls per batch
+    batch_max_questions: int = 200
+    
+    # Intent Routing
+    # Cosine similarity needed for embedding-based small-talk matching (0 disables)
+    intent_similarity_threshold: float = 0.0
+    
+    # Precomputed Answer Bank (built by `python -m app.rag.answer_bank`)
+    answer_bank_dir: str = "./answer_bank"
+    # Cosine similarity needed to serve a bank answer for a paraphrase (0 = exact match only)
+    answer_bank_similarity_threshold: float = 0.0
+    
     # Chroma DB
     chroma_persist_dir: str = "./chroma_db"
+    # Memory budget for loaded collection indexes; least recently used are evicted (0 = unlimited)
+    chroma_memory_limit_mb: int = 512
+    
+    # Personas (see app/services/personas.py); the default persona needs no files
+    personas_dir: str = "./personas"
+    persona_cache_size: int = 64  # Persona vector stores / prompt templates kept open
+    
+    # Async Retrieval
+    retrieval_max_workers: int = 4  # Threads for vector search
+    embedding_timeout: float = 10.0  # Seconds per query embedding call
+    embedding_slow_call_ms: int = 2000  # Embedding calls slower than this count against its breaker
     
     # Private Knowledge Repository
     github_token: str = ""
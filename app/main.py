@@ -1,14 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
 from app.api.routes import router
+from app.utils.tracing import setup_tracing, shutdown_tracing
 
 settings = get_settings()
+setup_tracing()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm caches in the background so startup isn't blocked on Polly."""
+    from app.services.intent_router import warm_intent_audio
+    from app.rag.retrieval import close_http_client
+    
+    warmup = asyncio.create_task(warm_intent_audio())
+    yield
+    warmup.cancel()
+    await close_http_client()
+    shutdown_tracing()
+
 
 app = FastAPI(
     title="Swalih Chatbot API",
     description="AI-powered chatbot that responds as Swalih with voice and lip-sync",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS configuration
@@ -0,0 +1,43 @@
+"""Templated answers for small-talk intents that skip RAG and the LLM."""
+
+# Canned replies, keyed by intent name. Keep them short: they are
+# synthesized once and replayed for every hit.
+INTENT_RESPONSES = {
+    "greeting": (
+        "Hey there! I'm Swalih, a software engineer from Kozhikode. "
+        "Ask me anything about my work, projects or experience."
+    ),
+    "identity": (
+        "I'm Swalih Kolakkadan, a Sr Software Engineer at Qburst. "
+        "I love building immersive web experiences, and this is my portfolio."
+    ),
+    "wellbeing": (
+        "I'm doing great, thanks for asking! "
+        "What would you like to know about me or my work?"
+    ),
+    "capabilities": (
+        "You can ask me about my experience, the projects I've built, "
+        "the tech I work with, or just what I'm up to these days."
+    ),
+    "thanks": (
+        "You're welcome! Feel free to ask if anything else comes to mind."
+    ),
+    "farewell": (
+        "Thanks for stopping by! It was great chatting with you."
+    ),
+    # Never matched by the router: served when the LLM is unavailable
+    "unavailable": (
+        "Sorry, my thoughts are a little slow right now. "
+        "Could you ask me that again in a moment?"
+    ),
+}
+
+# Example phrasings per intent, used for optional nearest-neighbour matching
+INTENT_EXAMPLES = {
+    "greeting": ["hi", "hello", "hey there", "good morning", "yo what's up"],
+    "identity": ["who are you", "what is your name", "introduce yourself", "tell me who you are"],
+    "wellbeing": ["how are you", "how's it going", "how are you doing today"],
+    "capabilities": ["what can you do", "what can I ask you", "how does this work"],
+    "thanks": ["thank you", "thanks a lot", "appreciate it"],
+    "farewell": ["bye", "goodbye", "see you later", "have a nice day"],
+}
@@ -45,3 +45,17 @@ Chat History:
 
 Follow Up Question: {question}
 Standalone question:"""
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a visitor and {assistant_name}.
+
+Keep every fact the visitor shared (name, company, what they are looking for),
+the topics already covered and anything {assistant_name} promised or asked.
+Write at most 5 short sentences in the third person. Do not add anything new.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
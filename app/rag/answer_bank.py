@@ -0,0 +1,246 @@
+"""
+Precomputed answer bank for the most common questions.
+
+The knowledge base only changes on ingest, so answers to the curated
+questions in `top_questions.txt` are effectively static. This build step
+runs each one through the RAG pipeline and Polly once and stores the
+text, MP3 and alignment on disk. At runtime matching questions are served
+straight from the bank.
+
+Bank layout (in `settings.answer_bank_dir`):
+    index.json      - entries with text + compact alignment, and the
+                      knowledge fingerprint the bank was built from
+    embeddings.f32  - question embeddings as packed float32, row per entry
+    audio/NNN.mp3   - raw MP3 per entry
+
+Usage:
+    python -m app.rag.answer_bank
+"""
+import re
+import json
+import base64
+import shutil
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.api.schemas import SpeechAlignment, VisemeMark, WordMark
+from app.rag.ingest import knowledge_fingerprint
+from app.utils.similarity import nearest_neighbour
+
+settings = get_settings()
+
+QUESTIONS_FILE = Path(__file__).parent / "top_questions.txt"
+
+BANK_VERSION = 1
+
+# Loaded bank, or None if not loaded yet. An empty dict means no usable bank.
+_bank: Optional[dict] = None
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact lookup (case, punctuation, whitespace)."""
+    return " ".join(re.sub(r"[^\w\s']", " ", question.lower()).split())
+
+
+def load_questions(path: Path = QUESTIONS_FILE) -> List[str]:
+    """Load the curated question list, skipping blanks and comments."""
+    questions = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            questions.append(line)
+    return questions
+
+
+async def build_answer_bank(questions: List[str] = None) -> int:
+    """
+    Run each curated question through RAG + TTS once and write the bank.
+    Returns the number of questions stored.
+    """
+    from app.rag.pipeline import get_rag_response, embeddings
+    from app.tts.polly import generate_speech_with_alignment
+
+    questions = questions or load_questions()
+    if not questions:
+        return 0
+
+    bank_dir = Path(settings.answer_bank_dir)
+    tmp_dir = bank_dir.with_name(bank_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    (tmp_dir / "audio").mkdir(parents=True)
+
+    entries = []
+    for i, question in enumerate(questions):
+        text = await get_rag_response(question)
+        audio_base64, alignment = await generate_speech_with_alignment(text)
+
+        audio_file = None
+        if audio_base64:
+            audio_file = f"audio/{i:03d}.mp3"
+            (tmp_dir / audio_file).write_bytes(base64.b64decode(audio_base64))
+
+        entries.append({
+            "question": question,
+            "key": normalize_question(question),
+            "text": text,
+            "audio": audio_file,
+            "visemes": [[m.time, m.viseme] for m in alignment.visemes] if alignment else [],
+            "words": [[m.time, m.value] for m in alignment.words] if alignment else [],
+        })
+        print(f"  ✅ {question}")
+
+    vectors = await embeddings.aembed_documents(questions, task_type="RETRIEVAL_QUERY")
+    packed = array("f")
+    for vector in vectors:
+        packed.extend(vector)
+    (tmp_dir / "embeddings.f32").write_bytes(packed.tobytes())
+
+    index = {
+        "version": BANK_VERSION,
+        "knowledge_fingerprint": knowledge_fingerprint(),
+        "dimensions": len(vectors[0]) if vectors else 0,
+        "entries": entries,
+    }
+    (tmp_dir / "index.json").write_text(json.dumps(index), encoding="utf-8")
+
+    # Swap in the new bank only once it is complete
+    if bank_dir.exists():
+        shutil.rmtree(bank_dir)
+    tmp_dir.rename(bank_dir)
+
+    reset_answer_bank()
+    return len(entries)
+
+
+def _load_bank() -> dict:
+    """Load the bank from disk. Returns an empty dict if missing or stale."""
+    bank_dir = Path(settings.answer_bank_dir)
+    index_path = bank_dir / "index.json"
+    if not index_path.exists():
+        return {}
+
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        if index.get("version") != BANK_VERSION:
+            print("Answer bank version mismatch, ignoring bank")
+            return {}
+        if index.get("knowledge_fingerprint") != knowledge_fingerprint():
+            print("Answer bank is stale (knowledge changed since build), ignoring bank")
+            return {}
+
+        answers = []
+        for entry in index["entries"]:
+            audio_base64 = None
+            if entry["audio"]:
+                audio_base64 = base64.b64encode((bank_dir / entry["audio"]).read_bytes()).decode("utf-8")
+
+            alignment = None
+            if audio_base64:
+                alignment = SpeechAlignment(
+                    visemes=[VisemeMark(time=t, viseme=v) for t, v in entry["visemes"]],
+                    words=[WordMark(time=t, value=v) for t, v in entry["words"]]
+                )
+            answers.append([entry["text"], audio_base64, alignment])
+
+        vectors = []
+        dimensions = index.get("dimensions", 0)
+        embeddings_path = bank_dir / "embeddings.f32"
+        if dimensions and embeddings_path.exists():
+            packed = array("f")
+            packed.frombytes(embeddings_path.read_bytes())
+            for i in range(len(answers)):
+                vectors.append((str(i), packed[i * dimensions:(i + 1) * dimensions]))
+
+        print(f"Answer bank loaded ({len(answers)} answers)")
+        return {
+            "answers": answers,
+            "keys": {entry["key"]: i for i, entry in enumerate(index["entries"])},
+            "vectors": vectors,
+        }
+    except Exception as e:
+        print(f"Failed to load answer bank: {e}")
+        return {}
+
+
+def get_answer_bank() -> dict:
+    """Get the loaded bank, loading it from disk on first use."""
+    global _bank
+    if _bank is None:
+        _bank = _load_bank()
+    return _bank
+
+
+def reset_answer_bank():
+    """Drop the in-memory bank so the next lookup reloads it from disk."""
+    global _bank
+    _bank = None
+
+
+async def lookup_answer(
+    question: str,
+    similarity_threshold: Optional[float] = None
+) -> Optional[Tuple[str, Optional[str], Optional[SpeechAlignment]]]:
+    """
+    Find a precomputed answer for a question.
+
+    Exact matches (after normalization) cost nothing. Semantic matching is
+    used only if `similarity_threshold` (default
+    `answer_bank_similarity_threshold`) is set, and costs one query
+    embedding call. Entries built without Polly credentials get their
+    audio synthesized on first hit and kept in memory.
+
+    Returns:
+        Tuple of (text, audio_base64, alignment) or None if not in the bank
+    """
+    bank = get_answer_bank()
+    if not bank:
+        return None
+
+    index = bank["keys"].get(normalize_question(question))
+    if index is None:
+        if similarity_threshold is None:
+            similarity_threshold = settings.answer_bank_similarity_threshold
+        index = await _match_semantic(question, bank, similarity_threshold)
+    if index is None:
+        return None
+
+    answer = bank["answers"][index]
+    if answer[1] is None:
+        from app.tts.polly import generate_speech_with_alignment
+
+        answer[1], answer[2] = await generate_speech_with_alignment(answer[0])
+    return tuple(answer)
+
+
+async def _match_semantic(question: str, bank: dict, threshold: float) -> Optional[int]:
+    """Find the bank entry closest to a paraphrased question, if close enough."""
+    if threshold <= 0 or not bank["vectors"]:
+        return None
+
+    try:
+        from app.rag.retrieval import aembed_query
+
+        query_vector = await aembed_query(question)
+    except Exception as e:
+        print(f"Answer bank embedding error: {e}")
+        return None
+
+    best = nearest_neighbour(query_vector, bank["vectors"])
+    if best and best[1] >= threshold:
+        return int(best[0])
+    return None
+
+
+def get_answer_bank_stats() -> Dict[str, int]:
+    """Get the number of answers currently served from the bank."""
+    bank = get_answer_bank()
+    return {"answers": len(bank.get("answers", []))}
+
+
+if __name__ == "__main__":
+    """Build the answer bank manually (run after ingestion)."""
+    import asyncio
+    count = asyncio.run(build_answer_bank())
+    print(f"Stored {count} precomputed answers in {settings.answer_bank_dir}")
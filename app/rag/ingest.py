@@ -1,14 +1,17 @@
 """
 Knowledge base ingestion script.
 Loads markdown files and stores them in Chroma vector database.
+
+Run `python -m app.rag.ingest [persona_id]` to ingest a persona's own
+knowledge directory into its collection.
 """
 import os
 import asyncio
+import hashlib
 from pathlib import Path
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from app.config import get_settings
 
 settings = get_settings()
@@ -17,10 +20,10 @@ settings = get_settings()
 KNOWLEDGE_DIR = Path(__file__).parent.parent.parent / "knowledge"
 
 
-def load_documents():
+def load_documents(knowledge_dir: Path = KNOWLEDGE_DIR):
     """Load all markdown files from knowledge directory."""
     loader = DirectoryLoader(
-        str(KNOWLEDGE_DIR),
+        str(knowledge_dir),
         glob="**/*.md",
         loader_cls=TextLoader,
         loader_kwargs={"encoding": "utf-8"}
@@ -28,6 +31,21 @@ def load_documents():
     return loader.load()
 
 
+def knowledge_fingerprint(knowledge_dir: Path = KNOWLEDGE_DIR) -> str:
+    """
+    Hash the knowledge files so derived artifacts can detect staleness.
+    Returns an empty string if the knowledge directory does not exist.
+    """
+    if not knowledge_dir.exists():
+        return ""
+    
+    digest = hashlib.sha256()
+    for path in sorted(knowledge_dir.glob("**/*.md")):
+        digest.update(path.relative_to(knowledge_dir).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
 def split_documents(documents):
     """Split documents into chunks for embedding."""
     splitter = RecursiveCharacterTextSplitter(
@@ -38,41 +56,47 @@ def split_documents(documents):
     return splitter.split_documents(documents)
 
 
-async def ingest_knowledge_base() -> int:
+async def ingest_knowledge_base(persona=None) -> int:
     """
-    Ingest all markdown files from knowledge directory into Chroma.
+    Ingest all markdown files from a persona's knowledge directory into
+    its Chroma collection (the default persona if None).
     Returns the number of documents ingested.
     """
+    from app.rag.pipeline import chroma_client, embeddings, evict_persona
+    from app.services.personas import get_default_persona
+    
+    persona = persona or get_default_persona()
+    knowledge_dir = persona.knowledge_dir
+    
     # Ensure knowledge directory exists
-    if not KNOWLEDGE_DIR.exists():
-        KNOWLEDGE_DIR.mkdir(parents=True)
+    if not knowledge_dir.exists():
+        knowledge_dir.mkdir(parents=True)
         return 0
     
     # Load and split documents
-    documents = load_documents()
+    documents = load_documents(knowledge_dir)
     if not documents:
         return 0
     
     chunks = split_documents(documents)
     
-    # Create embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model="gemini-embedding-001",
-        google_api_key=settings.google_api_key
-    )
-    
     # Clear existing database and create new one
     vectorstore = Chroma.from_documents(
         documents=chunks,
         embedding=embeddings,
-        persist_directory=settings.chroma_persist_dir
+        client=chroma_client,
+        collection_name=persona.collection
     )
+    evict_persona(persona.id)
     
     return len(chunks)
 
 
 if __name__ == "__main__":
     """Run ingestion manually."""
+    import sys
     import asyncio
-    count = asyncio.run(ingest_knowledge_base())
-    print(f"Ingested {count} document chunks")
+    from app.services.personas import get_persona
+    persona = get_persona(sys.argv[1] if len(sys.argv) > 1 else None)
+    count = asyncio.run(ingest_knowledge_base(persona))
+    print(f"Ingested {count} document chunks for persona '{persona.id}'")
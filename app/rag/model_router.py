@@ -0,0 +1,209 @@
+"""
+Adaptive LLM routing by question complexity.
+
+Picks a model tier, output token budget and context size per question
+from cheap local signals (question length, retrieval similarity and a
+regex question-type check), so trivial follow-ups don't pay the same
+latency as detailed technical questions. Tracks per-route latency and
+token usage, and temporarily moves primary-model routes to the fast
+model when the primary's recent p95 latency goes over budget or its
+circuit breaker is open.
+"""
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI
+from app.config import get_settings
+from app.rag.retrieval import RETRIEVAL_K
+from app.utils.resilience import OPEN, CircuitBreaker, get_breaker
+
+settings = get_settings()
+
+# Questions that usually need a longer, more technical answer
+DETAILED_PATTERN = re.compile(
+    r"\b(how (?:do|does|did|would|can)|why|explain|describe|walk me through|difference"
+    r"|compare|architecture|design|implement|approach|challeng\w*|trade-?offs?)\b",
+    re.IGNORECASE
+)
+
+# Word counts separating brief / standard / detailed questions
+BRIEF_MAX_WORDS = 4
+DETAILED_MIN_WORDS = 18
+
+# Below this best-chunk similarity the knowledge base has little to say
+LOW_RELEVANCE = 0.5
+
+# Latency samples older than this are ignored for p95 / fallback decisions
+LATENCY_WINDOW_SECONDS = 300
+MIN_FALLBACK_SAMPLES = 5
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Generation settings for one complexity tier."""
+    name: str
+    model: str
+    max_output_tokens: int
+    context_chunks: int
+
+
+def get_routes() -> Dict[str, ModelRoute]:
+    """Build the route table from settings."""
+    return {
+        "brief": ModelRoute(
+            name="brief",
+            model=settings.llm_fast_model,
+            max_output_tokens=settings.llm_brief_max_tokens,
+            context_chunks=3,
+        ),
+        "standard": ModelRoute(
+            name="standard",
+            model=settings.llm_primary_model,
+            max_output_tokens=settings.llm_standard_max_tokens,
+            context_chunks=RETRIEVAL_K,
+        ),
+        "detailed": ModelRoute(
+            name="detailed",
+            model=settings.llm_primary_model,
+            max_output_tokens=settings.llm_detailed_max_tokens,
+            context_chunks=RETRIEVAL_K,
+        ),
+    }
+
+
+# Chat models per (model, max_output_tokens), created on first use
+_llms: Dict[Tuple[str, int], ChatGoogleGenerativeAI] = {}
+
+# Recent (timestamp, latency_seconds) samples per model, for fallback decisions
+_model_latencies: Dict[str, Deque[Tuple[float, float]]] = {}
+
+# Per-route metrics: {route: {"calls", "fallbacks", "input_tokens", "output_tokens", "latencies"}}
+_route_metrics: Dict[str, dict] = {}
+
+
+def get_llm(route: ModelRoute) -> ChatGoogleGenerativeAI:
+    """Get the chat model configured for a route."""
+    key = (route.model, route.max_output_tokens)
+    if key not in _llms:
+        _llms[key] = ChatGoogleGenerativeAI(
+            model=route.model,
+            google_api_key=settings.google_api_key,
+            temperature=0.7,
+            max_output_tokens=route.max_output_tokens,
+            convert_system_message_to_human=True
+        )
+    return _llms[key]
+
+
+def llm_breaker(model: str) -> CircuitBreaker:
+    """Get the circuit breaker for a model; calls over the latency budget count as slow."""
+    budget = settings.llm_latency_budget_ms
+    return get_breaker(f"llm:{model}", slow_call_seconds=budget / 1000 if budget > 0 else None)
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of a list of values (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _recent_latencies(model: str) -> List[float]:
+    """Latency samples for a model within the fallback window."""
+    cutoff = time.time() - LATENCY_WINDOW_SECONDS
+    return [latency for ts, latency in _model_latencies.get(model, ()) if ts >= cutoff]
+
+
+def primary_over_budget() -> bool:
+    """Whether the primary model's recent p95 latency exceeds the budget."""
+    budget = settings.llm_latency_budget_ms
+    if budget <= 0 or settings.llm_primary_model == settings.llm_fast_model:
+        return False
+    samples = _recent_latencies(settings.llm_primary_model)
+    if len(samples) < MIN_FALLBACK_SAMPLES:
+        return False
+    return _percentile(samples, 95) * 1000 > budget
+
+
+def select_route(question: str, similarities: List[float]) -> ModelRoute:
+    """
+    Pick a route from question length, question type and retrieval scores.
+
+    Falls back to the fast model when the primary model is over its
+    latency budget or its breaker is open; the route name is kept so
+    metrics stay comparable.
+    """
+    routes = get_routes()
+    words = len(question.split())
+    best_similarity = max(similarities, default=0.0)
+    detailed = bool(DETAILED_PATTERN.search(question))
+
+    if words <= BRIEF_MAX_WORDS or best_similarity < LOW_RELEVANCE:
+        # Short follow-ups, or nothing relevant in the knowledge base to expand on
+        route = routes["brief"]
+    elif detailed or words >= DETAILED_MIN_WORDS:
+        route = routes["detailed"]
+    else:
+        route = routes["standard"]
+
+    primary_unavailable = (
+        llm_breaker(settings.llm_primary_model).state == OPEN
+        and llm_breaker(settings.llm_fast_model).state != OPEN
+    )
+    if route.model == settings.llm_primary_model and (primary_over_budget() or primary_unavailable):
+        _metrics_for(route.name)["fallbacks"] += 1
+        route = ModelRoute(
+            name=route.name,
+            model=settings.llm_fast_model,
+            max_output_tokens=route.max_output_tokens,
+            context_chunks=route.context_chunks,
+        )
+    return route
+
+
+def _metrics_for(route_name: str) -> dict:
+    """Get or create the metrics entry for a route."""
+    if route_name not in _route_metrics:
+        _route_metrics[route_name] = {
+            "calls": 0,
+            "fallbacks": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "latencies": deque(maxlen=200),
+        }
+    return _route_metrics[route_name]
+
+
+def record_llm_call(route: ModelRoute, latency: float, usage: Optional[dict] = None):
+    """Record latency and token usage for a completed LLM call."""
+    _model_latencies.setdefault(route.model, deque(maxlen=200)).append((time.time(), latency))
+
+    metrics = _metrics_for(route.name)
+    metrics["calls"] += 1
+    metrics["latencies"].append(latency)
+    if usage:
+        metrics["input_tokens"] += usage.get("input_tokens", 0)
+        metrics["output_tokens"] += usage.get("output_tokens", 0)
+
+
+def get_route_stats() -> dict:
+    """Get per-route call counts, token totals and latency percentiles (ms)."""
+    routes = {}
+    for name, metrics in _route_metrics.items():
+        latencies = list(metrics["latencies"])
+        routes[name] = {
+            "calls": metrics["calls"],
+            "fallbacks": metrics["fallbacks"],
+            "input_tokens": metrics["input_tokens"],
+            "output_tokens": metrics["output_tokens"],
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        }
+    return {
+        "routes": routes,
+        "primary_over_budget": primary_over_budget(),
+    }
@@ -1,37 +1,56 @@
 """
 RAG Pipeline using LangChain with Google Gemini and Chroma.
+
+Each persona has its own Chroma collection and prompt template. All
+collections share one Chroma client whose segment cache is LRU-bounded by
+`chroma_memory_limit_mb`, so indexes for rarely used personas are loaded
+on demand and evicted under memory pressure.
 """
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Tuple
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 from app.config import get_settings
 from app.prompts.system import SYSTEM_PROMPT
+from app.rag.retrieval import EMBEDDING_MODEL, RETRIEVAL_K, aretrieve_with_scores
+from app.rag.model_router import ModelRoute, select_route, get_llm, llm_breaker, record_llm_call
+from app.utils.resilience import CLOSED, hedged
 from app.services.chat_history import ChatHistoryManager
+from app.services.personas import Persona, get_default_persona
 
 settings = get_settings()
 
 # Initialize embeddings
 embeddings = GoogleGenerativeAIEmbeddings(
-    model="models/gemini-embedding-001",
+    model=EMBEDDING_MODEL,
     google_api_key=settings.google_api_key
 )
 
-# Initialize vector store
-vectorstore = Chroma(
-    persist_directory=settings.chroma_persist_dir,
-    embedding_function=embeddings
+# One client for every persona's collection, with an LRU memory budget
+_chroma_settings = ChromaSettings(anonymized_telemetry=False)
+if settings.chroma_memory_limit_mb > 0:
+    _chroma_settings = ChromaSettings(
+        anonymized_telemetry=False,
+        chroma_segment_cache_policy="LRU",
+        chroma_memory_limit_bytes=settings.chroma_memory_limit_mb * 1024 * 1024
+    )
+chroma_client = chromadb.PersistentClient(
+    path=settings.chroma_persist_dir,
+    settings=_chroma_settings
 )
 
-# Initialize LLM
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    google_api_key=settings.google_api_key,
-    temperature=0.7,
-    max_output_tokens=150,
-    convert_system_message_to_human=True
+# Initialize the default persona's vector store
+vectorstore = Chroma(
+    client=chroma_client,
+    embedding_function=embeddings
 )
 
+# LLMs are created per route by app.rag.model_router
 
 # Create prompt template
 prompt_template = PromptTemplate(
@@ -39,50 +58,219 @@ prompt_template = PromptTemplate(
     input_variables=["context", "chat_history", "question"]
 )
 
+# Vector stores and prompt templates for other personas, least recently used first
+_persona_stores: "OrderedDict[str, Tuple[Chroma, PromptTemplate]]" = OrderedDict()
+
+
+def _get_persona_resources(persona: Optional[Persona]) -> Tuple[Chroma, PromptTemplate]:
+    """Get (vector store, prompt template) for a persona, opening them on first use."""
+    if persona is None or persona.is_default:
+        return vectorstore, prompt_template
+
+    resources = _persona_stores.get(persona.id)
+    if resources is None:
+        resources = (
+            Chroma(
+                client=chroma_client,
+                collection_name=persona.collection,
+                embedding_function=embeddings
+            ),
+            PromptTemplate(
+                template=persona.system_prompt,
+                input_variables=["context", "chat_history", "question"]
+            ),
+        )
+        _persona_stores[persona.id] = resources
+        if len(_persona_stores) > settings.persona_cache_size:
+            _persona_stores.popitem(last=False)
+    else:
+        _persona_stores.move_to_end(persona.id)
+    return resources
+
+
+def get_vectorstore(persona: Optional[Persona] = None) -> Chroma:
+    """Get the vector store for a persona (default persona if None)."""
+    return _get_persona_resources(persona)[0]
+
+
+def evict_persona(persona_id: str):
+    """Drop a persona's cached store and template (e.g. after re-ingestion)."""
+    _persona_stores.pop(persona_id, None)
+
+
+def get_persona_store_stats() -> dict:
+    """Number of persona stores currently open."""
+    return {"open_persona_stores": len(_persona_stores) + 1}
+
 
 def get_retriever():
     """Get the vector store retriever."""
     return vectorstore.as_retriever(
         search_type="similarity",
-        search_kwargs={"k": 5}
+        search_kwargs={"k": RETRIEVAL_K}
     )
 
 
-async def get_rag_response(question: str, session_id: str = None) -> str:
+def format_prompt(
+    question: str,
+    results: List[Tuple[Document, float]],
+    chat_history_str: str = "",
+    persona: Optional[Persona] = None
+) -> Tuple[str, ModelRoute]:
     """
-    Get a complete response from the RAG pipeline with chat history.
+    Pick a model route from the retrieval results and format the prompt.
+    
+    Returns:
+        Tuple of (formatted_prompt, route)
+    """
+    # Pick model, output budget and context size from cheap local signals
+    route = select_route(question, [score for _, score in results])
+    context = "\n\n".join([doc.page_content for doc, _ in results[:route.context_chunks]])
+    
+    # Format prompt with history
+    _, template = _get_persona_resources(persona)
+    formatted_prompt = template.format(
+        context=context,
+        chat_history=chat_history_str,
+        question=question
+    )
+    return formatted_prompt, route
+
+
+async def _build_prompt(
+    question: str,
+    session_id: str = None,
+    persona: Optional[Persona] = None
+) -> Tuple[str, ModelRoute]:
+    """
+    Retrieve context, pick a model route and format the prompt with chat history.
+    
+    Returns:
+        Tuple of (formatted_prompt, route)
     """
     from app.utils.timer import timer
     
-    retriever = get_retriever()
+    persona = persona or get_default_persona()
     
     # Get chat history
-    with timer("Get Chat History"):
-        chat_history_str = ChatHistoryManager.get_formatted_history(session_id) if session_id else ""
+    with timer("Get Chat History") as history_span:
+        chat_history_str = (
+            ChatHistoryManager.get_formatted_history(session_id, persona.name) if session_id else ""
+        )
+        history_span.set_attribute("history_chars", len(chat_history_str))
     
     search_query = question
 
-    # Retrieve relevant documents using the raw question
-    with timer("Retrieve Documents (Vector DB)"):
-        docs = retriever.invoke(search_query)
-        context = "\n\n".join([doc.page_content for doc in docs])
+    # Retrieve relevant documents using the raw question (async, off the event loop)
+    with timer("Retrieve Documents (Vector DB)", persona=persona.id) as retrieve_span:
+        results = await aretrieve_with_scores(get_vectorstore(persona), search_query)
+        retrieve_span.set_attribute("chunk_count", len(results))
     
-    # Format prompt with history
-    formatted_prompt = prompt_template.format(
-        context=context,
-        chat_history=chat_history_str,
-        question=question
-    )
+    return format_prompt(question, results, chat_history_str, persona)
+
+
+async def generate_answer(formatted_prompt: str, route: ModelRoute) -> str:
+    """
+    Run the prompt through the route's LLM and record its metrics.
     
-    # Get response
-    with timer("Generate Answer (LLM)"):
-        response = await llm.ainvoke(formatted_prompt)
-        response_text = response.content
+    The call goes through the model's circuit breaker with an `llm_timeout`
+    deadline, and is hedged after `llm_hedge_delay_ms` while the breaker is
+    closed. Raises UpstreamUnavailable if no answer can be had.
+    """
+    from app.utils.timer import timer
     
-    # Update history
+    llm = get_llm(route)
+    breaker = llm_breaker(route.model)
+    hedge_delay = settings.llm_hedge_delay_ms / 1000
+    
+    async def invoke():
+        # No hedging while probing a recovering model
+        if hedge_delay > 0 and breaker.state == CLOSED:
+            return await hedged(breaker.name, lambda: llm.ainvoke(formatted_prompt), hedge_delay)
+        return await llm.ainvoke(formatted_prompt)
+    
+    with timer(
+        "Generate Answer (LLM)",
+        route=route.name,
+        model=route.model,
+        prompt_chars=len(formatted_prompt)
+    ) as llm_span:
+        start = time.perf_counter()
+        response = await breaker.call(invoke, timeout=settings.llm_timeout)
+        record_llm_call(route, time.perf_counter() - start, response.usage_metadata)
+        if response.usage_metadata:
+            llm_span.set_attributes({
+                "input_tokens": response.usage_metadata.get("input_tokens", 0),
+                "output_tokens": response.usage_metadata.get("output_tokens", 0),
+            })
+        return response.content
+
+
+def _record_exchange(session_id: str, question: str, response_text: str):
+    """Append a question/answer pair to the session history."""
     if session_id:
         ChatHistoryManager.add_user_message(session_id, question)
         ChatHistoryManager.add_ai_message(session_id, response_text)
+
+
+async def get_rag_response(
+    question: str,
+    session_id: str = None,
+    persona: Optional[Persona] = None
+) -> str:
+    """
+    Get a complete response from the RAG pipeline with chat history.
+    """
+    formatted_prompt, route = await _build_prompt(question, session_id, persona)
+    
+    # Get response
+    response_text = await generate_answer(formatted_prompt, route)
+    
+    # Update history
+    _record_exchange(session_id, question, response_text)
         
     return response_text
 
+
+async def stream_rag_response(
+    question: str,
+    session_id: str = None,
+    persona: Optional[Persona] = None
+) -> AsyncIterator[str]:
+    """
+    Stream the RAG response as text chunks while the LLM generates it.
+    History is updated once the stream completes.
+    
+    The stream goes through the model's circuit breaker, with `llm_timeout`
+    applied between chunks (streams aren't hedged).
+    """
+    from app.utils.tracing import span
+    
+    formatted_prompt, route = await _build_prompt(question, session_id, persona)
+    
+    parts = []
+    usage = {}
+    start = time.perf_counter()
+    # A detached span rather than a timer: the generator yields inside it
+    with span(
+        "Stream Answer (LLM)",
+        attach=False,
+        route=route.name,
+        model=route.model,
+        prompt_chars=len(formatted_prompt)
+    ) as llm_span:
+        chunks = llm_breaker(route.model).stream(
+            get_llm(route).astream(formatted_prompt),
+            timeout=settings.llm_timeout
+        )
+        async for chunk in chunks:
+            if chunk.usage_metadata:
+                for key in ("input_tokens", "output_tokens"):
+                    usage[key] = usage.get(key, 0) + chunk.usage_metadata.get(key, 0)
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        llm_span.set_attributes(usage)
+    record_llm_call(route, time.perf_counter() - start, usage)
+    
+    _record_exchange(session_id, question, "".join(parts))
@@ -0,0 +1,192 @@
+"""
+Async retrieval layer.
+
+The LangChain retriever is synchronous: `retriever.invoke()` runs the
+Gemini query-embedding HTTP call and the Chroma search on the event loop
+thread, stalling every other request on the worker. Here the query is
+embedded with a pooled async HTTP client and the vector search runs on a
+small bounded executor, so neither blocks the loop.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import httpx
+from langchain_core.documents import Document
+from app.config import get_settings
+from app.utils.resilience import get_breaker
+from app.utils.tracing import run_in_executor
+
+settings = get_settings()
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+
+# Breaker name for query embedding calls (see app.utils.resilience)
+EMBEDDING_UPSTREAM = "gemini-embedding"
+
+# Number of chunks retrieved per question
+RETRIEVAL_K = 5
+
+# Gemini's limit on requests per batchEmbedContents call
+EMBED_BATCH_SIZE = 100
+
+# Shared HTTP client (connection pool + keep-alive), created on first use
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Bounded pool for Chroma searches, separate from the default executor
+# so slow searches can't starve other blocking work (e.g. Polly calls)
+_search_executor = ThreadPoolExecutor(
+    max_workers=settings.retrieval_max_workers,
+    thread_name_prefix="vector-search"
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client for Gemini API calls."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=GEMINI_API_URL,
+            headers={"x-goog-api-key": settings.google_api_key},
+            timeout=settings.embedding_timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def aembed_query(text: str) -> List[float]:
+    """
+    Embed a search query with the Gemini embedding API.
+
+    Goes through the embedding circuit breaker, so while the API is
+    failing or slow this raises UpstreamUnavailable immediately.
+    """
+    async def embed():
+        response = await get_http_client().post(
+            f"/{EMBEDDING_MODEL}:embedContent",
+            json={
+                "model": EMBEDDING_MODEL,
+                "content": {"parts": [{"text": text}]},
+                "taskType": "RETRIEVAL_QUERY",
+            }
+        )
+        response.raise_for_status()
+        return response.json()["embedding"]["values"]
+
+    breaker = get_breaker(EMBEDDING_UPSTREAM, slow_call_seconds=settings.embedding_slow_call_ms / 1000)
+    return await breaker.call(embed)
+
+
+async def aembed_queries(texts: List[str]) -> List[List[float]]:
+    """Embed many search queries with batched Gemini embedding calls."""
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        response = await get_http_client().post(
+            f"/{EMBEDDING_MODEL}:batchEmbedContents",
+            json={
+                "requests": [
+                    {
+                        "model": EMBEDDING_MODEL,
+                        "content": {"parts": [{"text": text}]},
+                        "taskType": "RETRIEVAL_QUERY",
+                    }
+                    for text in batch
+                ]
+            }
+        )
+        response.raise_for_status()
+        vectors.extend(item["values"] for item in response.json()["embeddings"])
+    return vectors
+
+
+def distance_to_similarity(distance: float) -> float:
+    """
+    Convert a Chroma distance to a cosine similarity.
+
+    Chroma's default space returns squared L2 distance, which for the unit
+    length Gemini embeddings is 2 - 2 * cos.
+    """
+    return 1.0 - distance / 2.0
+
+
+async def asearch(
+    vectorstore,
+    embedding: List[float],
+    k: int = RETRIEVAL_K
+) -> List[Tuple[Document, float]]:
+    """
+    Run a vector similarity search off the event loop.
+
+    Returns:
+        List of (document, similarity) pairs, most similar first
+    """
+    results = await run_in_executor(
+        _search_executor,
+        vectorstore.similarity_search_by_vector_with_relevance_scores,
+        embedding,
+        k
+    )
+    return [(doc, distance_to_similarity(distance)) for doc, distance in results]
+
+
+async def asearch_batch(
+    vectorstore,
+    embeddings: List[List[float]],
+    k: int = RETRIEVAL_K
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Run one multi-query vector search off the event loop.
+
+    Returns:
+        Per query, a list of (document, similarity) pairs, most similar first
+    """
+    def query():
+        # The LangChain wrapper only searches one vector at a time;
+        # the Chroma collection accepts a batch in a single call
+        return vectorstore._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+
+    results = await run_in_executor(_search_executor, query)
+
+    batches = []
+    for documents, metadatas, distances in zip(
+        results["documents"], results["metadatas"], results["distances"]
+    ):
+        batches.append([
+            (Document(page_content=text, metadata=metadata or {}), distance_to_similarity(distance))
+            for text, metadata, distance in zip(documents, metadatas, distances)
+        ])
+    return batches
+
+
+async def aretrieve_with_scores(
+    vectorstore,
+    query: str,
+    k: int = RETRIEVAL_K
+) -> List[Tuple[Document, float]]:
+    """Embed a query and retrieve the most similar chunks with their similarity."""
+    from app.utils.timer import timer
+
+    with timer("Embed Query", query_chars=len(query)):
+        embedding = await aembed_query(query)
+
+    with timer("Vector Search", k=k) as search_span:
+        results = await asearch(vectorstore, embedding, k)
+        search_span.set_attribute("chunk_count", len(results))
+        return results
+
+
+async def aretrieve(vectorstore, query: str, k: int = RETRIEVAL_K) -> List[Document]:
+    """Embed a query and retrieve the most similar chunks without blocking."""
+    return [doc for doc, _ in await aretrieve_with_scores(vectorstore, query, k)]
@@ -0,0 +1,82 @@
+"""
+Batch chat for evaluation runs and cache warming.
+
+Answers many questions in one go: all questions are embedded in batched
+embedding calls and retrieved with a single multi-query vector search,
+then LLM (and optional TTS) calls fan out under a concurrency limit.
+Results are yielded as each one completes, not in request order.
+"""
+import asyncio
+from typing import AsyncIterator, List, Tuple
+from langchain_core.documents import Document
+from app.api.schemas import BatchChatResult
+from app.rag.pipeline import vectorstore, format_prompt, generate_answer
+from app.rag.retrieval import aembed_queries, asearch_batch
+from app.tts.polly import generate_speech_with_alignment
+
+
+async def run_batch(
+    questions: List[str],
+    include_audio: bool = False,
+    concurrency: int = 4
+) -> AsyncIterator[BatchChatResult]:
+    """
+    Answer a list of questions without chat history.
+
+    Retrieval for the whole batch runs up front, so embedding or search
+    errors are raised here. Returns an async iterator yielding one result
+    per question as soon as it is ready.
+    """
+    from app.utils.timer import timer
+
+    with timer("Batch Retrieval", questions=len(questions)):
+        embeddings = await aembed_queries(questions)
+        retrieved = await asearch_batch(vectorstore, embeddings)
+
+    return _answer_all(questions, retrieved, include_audio, concurrency)
+
+
+async def _answer_all(
+    questions: List[str],
+    retrieved: List[List[Tuple[Document, float]]],
+    include_audio: bool,
+    concurrency: int
+) -> AsyncIterator[BatchChatResult]:
+    """
+    Fan out LLM (and TTS) calls under a concurrency limit.
+
+    A failure on one question is reported in its result and doesn't stop
+    the batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def answer(index: int) -> BatchChatResult:
+        question = questions[index]
+        async with semaphore:
+            try:
+                formatted_prompt, route = format_prompt(question, retrieved[index])
+                text = await generate_answer(formatted_prompt, route)
+
+                audio_base64, alignment = None, None
+                if include_audio:
+                    audio_base64, alignment = await generate_speech_with_alignment(text)
+
+                return BatchChatResult(
+                    index=index,
+                    question=question,
+                    text=text,
+                    audio_base64=audio_base64,
+                    alignment=alignment,
+                    route=route.name
+                )
+            except Exception as e:
+                return BatchChatResult(index=index, question=question, error=str(e))
+
+    tasks = [asyncio.create_task(answer(i)) for i in range(len(questions))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away mid-stream: don't keep spending LLM/TTS calls
+        for task in tasks:
+            task.cancel()
@@ -1,6 +1,9 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from collections import deque
 import time
+from app.config import get_settings
+
+settings = get_settings()
 
 # Global in-memory storage for chat history
 # Format: {session_id: deque([(role, message), ...])}
@@ -13,9 +16,36 @@ MAX_HISTORY_LENGTH = 10
 SESSION_TIMEOUT = 1800
 _session_timestamps: Dict[str, float] = {}
 
+# Rolling summaries of turns folded out of the raw history (see app.services.memory)
+_session_summaries: Dict[str, str] = {}
+
+# Character counts of folded messages, to estimate what the raw history would have cost
+_folded_lengths: Dict[str, deque] = {}
+
+# Per-session prompt accounting: {session_id: {"prompts", "folds", "history_tokens_raw", ...}}
+_memory_stats: Dict[str, dict] = {}
+_memory_totals = {"prompts": 0, "folds": 0, "history_tokens_raw": 0, "history_tokens_sent": 0}
+
+# Rough Gemini tokenization for English text; used for reporting only
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of prompt text."""
+    return _chars_to_tokens(len(text))
+
+
+def _chars_to_tokens(chars: int) -> int:
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
 class ChatHistoryManager:
     """
     Manages chat history for different sessions in-memory.
+
+    With MEMORY_SUMMARY enabled, older exchanges are folded into a rolling
+    summary after each answer (app.services.memory) and the prompt gets
+    the summary plus the recent exchanges instead of the whole history.
     """
     
     @staticmethod
@@ -28,6 +58,9 @@ class ChatHistoryManager:
             if current_time - _session_timestamps[session_id] > SESSION_TIMEOUT:
                 if session_id in _chat_histories:
                     del _chat_histories[session_id]
+                _session_summaries.pop(session_id, None)
+                _folded_lengths.pop(session_id, None)
+                _memory_stats.pop(session_id, None)
         
         # Create new if doesn't exist
         if session_id not in _chat_histories:
@@ -54,7 +87,7 @@ class ChatHistoryManager:
 
     @classmethod
     def get_history(cls, session_id: str) -> List[Tuple[str, str]]:
-        """Get complete history for a session."""
+        """Get the messages not yet folded into the summary."""
         if not session_id or session_id not in _chat_histories:
             return []
         
@@ -63,17 +96,136 @@ class ChatHistoryManager:
         return list(_chat_histories[session_id])
 
     @classmethod
-    def get_formatted_history(cls, session_id: str) -> str:
-        """Get history formatted as a string for LLM context."""
+    def get_summary(cls, session_id: str) -> str:
+        """Get the rolling summary of folded turns ("" if none)."""
+        return _session_summaries.get(session_id, "") if session_id else ""
+
+    @staticmethod
+    def _format_message(role: str, content: str, assistant_name: str) -> str:
+        speaker = "User" if role == "user" else assistant_name
+        return f"{speaker}: {content}"
+
+    @classmethod
+    def get_formatted_history(cls, session_id: str, assistant_name: str = "Swalih") -> str:
+        """
+        Get history formatted as a string for LLM context.
+        Records the prompt tokens this saves over sending the raw history.
+        """
         history = cls.get_history(session_id)
-        if not history:
+        summary = cls.get_summary(session_id)
+        if not history and not summary:
             return ""
             
-        formatted = []
-        for role, content in history:
-            if role == "user":
-                formatted.append(f"User: {content}")
-            else:
-                formatted.append(f"Swalih: {content}")
+        formatted = [cls._format_message(role, content, assistant_name) for role, content in history]
+        if summary:
+            formatted.insert(0, f"Summary of the earlier conversation: {summary}")
+        chat_history = "\n".join(formatted)
                 
-        return "\n".join(formatted)
+        cls._record_prompt(session_id, history, chat_history, assistant_name)
+        return chat_history
+
+    @classmethod
+    def _record_prompt(
+        cls,
+        session_id: str,
+        history: List[Tuple[str, str]],
+        chat_history: str,
+        assistant_name: str
+    ):
+        """Account the history actually sent against the raw history it replaces."""
+        # Without summaries the prompt would carry the last MAX_HISTORY_LENGTH
+        # exchanges verbatim, folded ones included
+        raw_lengths = [len(cls._format_message(role, content, assistant_name)) for role, content in history]
+        folded = list(_folded_lengths.get(session_id, ()))
+        room = MAX_HISTORY_LENGTH * 2 - len(raw_lengths)
+        if room > 0 and folded:
+            raw_lengths = folded[-room:] + raw_lengths
+        raw_chars = sum(raw_lengths) + max(len(raw_lengths) - 1, 0)
+
+        stats = _memory_stats.setdefault(session_id, {
+            "prompts": 0, "folds": 0, "history_tokens_raw": 0, "history_tokens_sent": 0
+        })
+        for entry in (stats, _memory_totals):
+            entry["prompts"] += 1
+            entry["history_tokens_raw"] += _chars_to_tokens(raw_chars)
+            entry["history_tokens_sent"] += estimate_tokens(chat_history)
+
+    @classmethod
+    def get_messages_to_fold(cls, session_id: str) -> List[Tuple[str, str]]:
+        """
+        Messages due to be folded into the summary: everything before the
+        last MEMORY_KEEP_TURNS exchanges, once at least MEMORY_FOLD_TURNS
+        exchanges have built up there. Empty if nothing is due.
+        """
+        if not settings.memory_summary or not session_id or session_id not in _chat_histories:
+            return []
+        history = list(_chat_histories[session_id])
+        older = history[:max(len(history) - settings.memory_keep_turns * 2, 0)]
+        if len(older) < settings.memory_fold_turns * 2:
+            return []
+        return older
+
+    @classmethod
+    def apply_summary(
+        cls,
+        session_id: str,
+        summary: str,
+        folded: List[Tuple[str, str]],
+        assistant_name: str = "Swalih"
+    ):
+        """
+        Store a new rolling summary and drop the messages it covers.
+        Messages added while the summary was being written are kept.
+        """
+        history = _chat_histories.get(session_id)
+        if history is None:
+            # Session expired meanwhile
+            return
+
+        lengths = _folded_lengths.setdefault(session_id, deque(maxlen=MAX_HISTORY_LENGTH * 2))
+        for message in folded:
+            # Compare by identity: the same text can legitimately repeat
+            if history and history[0] is message:
+                history.popleft()
+                lengths.append(len(cls._format_message(*message, assistant_name)))
+
+        _session_summaries[session_id] = summary
+        stats = _memory_stats.setdefault(session_id, {
+            "prompts": 0, "folds": 0, "history_tokens_raw": 0, "history_tokens_sent": 0
+        })
+        stats["folds"] += 1
+        _memory_totals["folds"] += 1
+
+    @staticmethod
+    def _with_savings(stats: dict) -> dict:
+        saved = stats["history_tokens_raw"] - stats["history_tokens_sent"]
+        raw = stats["history_tokens_raw"]
+        return {
+            **stats,
+            "saved_tokens": saved,
+            "saved_pct": round(saved / raw * 100, 1) if raw else 0.0,
+        }
+
+    @classmethod
+    def get_session_memory_stats(cls, session_id: Optional[str] = None) -> dict:
+        """Per-session history token accounting, or one session's if given."""
+        if session_id:
+            stats = _memory_stats.get(session_id)
+            return cls._with_savings(stats) if stats else {}
+        return {
+            session: {
+                **cls._with_savings(stats),
+                "summary_tokens": estimate_tokens(_session_summaries.get(session, "")),
+            }
+            for session, stats in _memory_stats.items()
+        }
+
+    @classmethod
+    def get_memory_stats(cls) -> dict:
+        """Totals across sessions of history tokens sent vs the raw history."""
+        return {
+            "enabled": settings.memory_summary,
+            "sessions": len(_memory_stats),
+            "summarized_sessions": len(_session_summaries),
+            **cls._with_savings(_memory_totals),
+        }
@@ -0,0 +1,288 @@
+"""
+WebSocket conversation channel.
+
+One connection carries a whole conversation: the persona, session and
+rate-limit key are resolved once when the socket opens, and each turn
+pushes its answer as binary frames while it is being produced instead of
+one JSON body at the end. Every frame is a one-byte type followed by the
+payload:
+
+    0x01 TOKEN   UTF-8 text as the LLM streams it
+    0x02 AUDIO   uint16 segment index + MP3 bytes for one sentence
+    0x03 MARKS   uint16 segment index + JSON {"visemes", "words"}, times
+                 relative to the start of that segment
+    0x04 END     JSON {"turn", "text", "source", "cancelled"}
+    0x05 ERROR   JSON {"code", "detail"}
+
+Clients send JSON text frames: {"type": "message", "text": "..."} starts a
+turn and {"type": "cancel"} stops the current one. A new message while a
+turn is running interrupts it. Interrupting cancels the turn's task, which
+closes the LLM stream and cancels pending Polly calls.
+
+Outgoing frames go through a bounded queue drained by a single writer, so
+a slow client slows down how fast the LLM stream is read rather than
+buffering without limit. A client that stops reading altogether is
+disconnected after `ws_send_timeout`.
+"""
+import base64
+import struct
+import asyncio
+from typing import List, Optional
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+from app.config import get_settings
+from app.api.responses import encode_alignment
+from app.api.schemas import SpeechAlignment
+from app.rag.answer_bank import lookup_answer
+from app.rag.pipeline import stream_rag_response
+from app.services.chat_history import ChatHistoryManager
+from app.services.fallback import fallback_answer
+from app.services.intent_router import classify_intent, answer_intent
+from app.services.memory import schedule_fold
+from app.services.personas import Persona
+from app.tts.pipelined import SentenceSegmenter
+from app.tts.polly import synthesize_speech, parse_speech_marks
+from app.utils.rate_limiter import check_rate_limit
+from app.utils.resilience import UpstreamUnavailable
+
+settings = get_settings()
+
+FRAME_TOKEN = 0x01
+FRAME_AUDIO = 0x02
+FRAME_MARKS = 0x03
+FRAME_END = 0x04
+FRAME_ERROR = 0x05
+
+# WebSocket close code for a client too slow to keep up
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class SlowClientError(Exception):
+    """The client stopped reading and the send queue stayed full."""
+
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    """Prefix a payload with its frame type byte."""
+    return bytes((frame_type,)) + payload
+
+
+def encode_segment(frame_type: int, index: int, payload: bytes) -> bytes:
+    """Encode an AUDIO or MARKS frame for one sentence segment."""
+    return encode_frame(frame_type, struct.pack(">H", index) + payload)
+
+
+class ConversationChannel:
+    """
+    Serve one WebSocket connection for its whole lifetime.
+    """
+
+    def __init__(self, websocket: WebSocket, persona: Persona, session_id: Optional[str]):
+        self.websocket = websocket
+        self.persona = persona
+        # Resolved once for the connection instead of per request
+        self.session_id = persona.scoped_key(session_id)
+        self.rate_limit_key = persona.scoped_key(session_id or "anonymous")
+        self.turns = 0
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self._turn: Optional[asyncio.Task] = None
+
+    async def run(self):
+        """Receive client messages until the socket closes."""
+        writer = asyncio.create_task(self._write_frames())
+        try:
+            while True:
+                try:
+                    event = orjson.loads(await self.websocket.receive_text())
+                except (orjson.JSONDecodeError, KeyError, TypeError):
+                    # Binary frames have no "text" and can't be decoded as events
+                    await self._send_error("bad_request", "Frames must be JSON text")
+                    continue
+
+                if writer.done():
+                    # Writer gave up on a slow client
+                    break
+                kind = event.get("type") if isinstance(event, dict) else None
+                if kind == "cancel":
+                    await self._cancel_turn()
+                elif kind == "message" and isinstance(event.get("text"), str) and event["text"].strip():
+                    # A new message interrupts whatever is still being answered
+                    await self._cancel_turn()
+                    self.turns += 1
+                    self._turn = asyncio.create_task(self._run_turn(self.turns, event["text"]))
+                else:
+                    await self._send_error("bad_request", "Expected a 'message' or 'cancel' event")
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if self._turn:
+                self._turn.cancel()
+            writer.cancel()
+
+    async def _write_frames(self):
+        """Single writer: drain the outbox to the socket in order."""
+        try:
+            while True:
+                frame = await self._outbox.get()
+                await self.websocket.send_bytes(frame)
+        except (WebSocketDisconnect, RuntimeError):
+            # Socket closed under us; the receive loop notices and exits
+            pass
+
+    async def _send(self, frame: bytes):
+        """Queue a frame, waiting while the client is behind (backpressure)."""
+        try:
+            await asyncio.wait_for(self._outbox.put(frame), settings.ws_send_timeout)
+        except asyncio.TimeoutError:
+            raise SlowClientError()
+
+    async def _send_json(self, frame_type: int, payload: dict):
+        await self._send(encode_frame(frame_type, orjson.dumps(payload)))
+
+    async def _send_error(self, code: str, detail: str):
+        await self._send_json(FRAME_ERROR, {"code": code, "detail": detail})
+
+    async def _cancel_turn(self):
+        """Cancel the in-flight turn and wait for it to unwind."""
+        if self._turn and not self._turn.done():
+            self._turn.cancel()
+            try:
+                await self._turn
+            except asyncio.CancelledError:
+                pass
+        self._turn = None
+
+    async def _run_turn(self, turn: int, message: str):
+        """Answer one message, streaming frames as they are produced."""
+        from app.utils.timer import timer
+
+        text, source = "", "rag"
+        try:
+            with timer("WebSocket Turn", persona=self.persona.id, turn=turn) as turn_span:
+                if not check_rate_limit(self.rate_limit_key, limit=self.persona.rate_limit_per_day):
+                    await self._send_error("rate_limited", "Rate limit exceeded. Try again tomorrow!")
+                    return
+                text, source = await self._answer(message)
+                turn_span.set_attribute("answer_source", source)
+            await self._send_json(FRAME_END, {
+                "turn": turn, "text": text, "source": source, "cancelled": False
+            })
+            schedule_fold(self.session_id, self.persona.name)
+        except asyncio.CancelledError:
+            # Interrupted: tell the client this turn is over, without waiting on a slow socket
+            try:
+                self._outbox.put_nowait(encode_frame(FRAME_END, orjson.dumps({
+                    "turn": turn, "text": text, "source": source, "cancelled": True
+                })))
+            except asyncio.QueueFull:
+                pass
+            raise
+        except SlowClientError:
+            await self.websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        except Exception as e:
+            await self._send_error("internal", str(e))
+
+    async def _answer(self, message: str):
+        """
+        Route a message like the HTTP endpoint does and stream the answer.
+
+        Returns:
+            Tuple of (text, source)
+        """
+        intent = await classify_intent(message)
+        if intent and intent in self.persona.intent_responses:
+            text, audio_base64, alignment = await answer_intent(
+                intent, message, self.session_id, self.persona
+            )
+            await self._send_static(text, audio_base64, alignment)
+            return text, f"intent:{intent}"
+
+        if self.persona.answer_bank:
+            banked = await lookup_answer(message)
+            if banked:
+                text, audio_base64, alignment = banked
+                if self.session_id:
+                    ChatHistoryManager.add_user_message(self.session_id, message)
+                    ChatHistoryManager.add_ai_message(self.session_id, text)
+                await self._send_static(text, audio_base64, alignment)
+                return text, "answer_bank"
+
+        streamed = []
+        try:
+            await self._stream_answer(message, streamed)
+        except UpstreamUnavailable as e:
+            if streamed:
+                # Part of the answer is already on screen; don't append a different one
+                await self._send_error("upstream_unavailable", str(e))
+                return "".join(streamed), "rag"
+            print(f"Answering without the LLM ({e})")
+            text, audio_base64, alignment, source = await fallback_answer(message, self.persona)
+            await self._send_static(text, audio_base64, alignment)
+            return text, f"fallback:{source}"
+        return "".join(streamed), "rag"
+
+    async def _send_static(
+        self,
+        text: str,
+        audio_base64: Optional[str],
+        alignment: Optional[SpeechAlignment]
+    ):
+        """Send a ready-made answer as one token frame and one audio segment."""
+        await self._send(encode_frame(FRAME_TOKEN, text.encode("utf-8")))
+        if audio_base64:
+            await self._send(encode_segment(FRAME_AUDIO, 0, base64.b64decode(audio_base64)))
+            await self._send(encode_segment(FRAME_MARKS, 0, encode_alignment(alignment) or b"{}"))
+
+    async def _stream_answer(self, message: str, streamed: List[str]):
+        """
+        Stream LLM tokens and synthesize each completed sentence meanwhile.
+        Audio segments are pushed in order as soon as each is ready.
+        """
+        segmenter = SentenceSegmenter()
+        segments: asyncio.Queue = asyncio.Queue()
+        voice_id = self.persona.voice_id
+
+        async def push_audio():
+            index = 0
+            while True:
+                task = await segments.get()
+                if task is None:
+                    return
+                try:
+                    result = await task
+                except UpstreamUnavailable as e:
+                    # This sentence goes out text-only; keep going with the rest
+                    print(f"Polly unavailable for segment {index} ({e})")
+                    result = None
+                if result is not None:
+                    audio, speech_marks_data = result
+                    visemes, words = parse_speech_marks(speech_marks_data)
+                    marks = encode_alignment(SpeechAlignment(visemes=visemes, words=words))
+                    await self._send(encode_segment(FRAME_AUDIO, index, audio))
+                    await self._send(encode_segment(FRAME_MARKS, index, marks))
+                index += 1
+
+        pending: List[asyncio.Task] = []
+
+        def synthesize(segment: str):
+            task = asyncio.create_task(synthesize_speech(segment, voice_id))
+            pending.append(task)
+            segments.put_nowait(task)
+
+        pusher = asyncio.create_task(push_audio())
+        try:
+            async for chunk in stream_rag_response(message, self.session_id, self.persona):
+                streamed.append(chunk)
+                await self._send(encode_frame(FRAME_TOKEN, chunk.encode("utf-8")))
+                for segment in segmenter.feed(chunk):
+                    synthesize(segment)
+
+            rest = segmenter.flush()
+            if rest:
+                synthesize(rest)
+            segments.put_nowait(None)
+            await pusher
+        finally:
+            # Interrupted or failed: stop any Polly work still in flight
+            pusher.cancel()
+            for task in pending:
+                task.cancel()
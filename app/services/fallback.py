@@ -0,0 +1,44 @@
+"""
+Degraded answers for when the LLM (or retrieval) is unavailable.
+
+Prefers the closest precomputed answer bank entry, with a looser
+similarity threshold than normal serving, and otherwise a templated
+"try again" answer whose audio is synthesized once like other intents.
+"""
+from typing import Optional, Tuple
+from app.config import get_settings
+from app.api.schemas import SpeechAlignment
+from app.rag.answer_bank import lookup_answer
+from app.services.intent_router import get_intent_audio
+from app.services.personas import Persona, get_default_persona
+
+settings = get_settings()
+
+# Template served when nothing better is available
+UNAVAILABLE_INTENT = "unavailable"
+
+
+async def fallback_answer(
+    question: str,
+    persona: Optional[Persona] = None
+) -> Tuple[str, Optional[str], Optional[SpeechAlignment], str]:
+    """
+    Answer without the LLM. Not recorded in chat history.
+    Only personas with an answer bank try it first.
+
+    Returns:
+        Tuple of (text, audio_base64, alignment, source) where source is
+        "answer_bank" or "unavailable"
+    """
+    persona = persona or get_default_persona()
+    if persona.answer_bank:
+        banked = await lookup_answer(
+            question, similarity_threshold=settings.fallback_similarity_threshold
+        )
+        if banked:
+            text, audio_base64, alignment = banked
+            return text, audio_base64, alignment, "answer_bank"
+
+    audio_base64, alignment = await get_intent_audio(UNAVAILABLE_INTENT, persona)
+    text = persona.intent_responses[UNAVAILABLE_INTENT]
+    return text, audio_base64, alignment, UNAVAILABLE_INTENT
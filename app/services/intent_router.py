@@ -0,0 +1,203 @@
+"""
+Lightweight intent router in front of the RAG pipeline.
+
+Small talk ("hi", "who are you", "thanks") is matched locally with regex
+rules and, optionally, nearest-neighbour over a handful of example
+embeddings. Matched intents are answered from templates whose audio is
+synthesized once and replayed, so only open-ended questions reach
+retrieval and the LLM.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.api.schemas import SpeechAlignment
+from app.prompts.intents import INTENT_RESPONSES, INTENT_EXAMPLES
+from app.services.chat_history import ChatHistoryManager
+from app.services.personas import Persona, get_default_persona
+from app.utils.similarity import nearest_neighbour
+
+settings = get_settings()
+
+# Hit counter key for messages that fall through to the RAG pipeline
+RAG_INTENT = "rag"
+
+# Only messages this short are considered for semantic matching
+SEMANTIC_MAX_WORDS = 6
+
+_FILLER = r"(?:\s+(?:there|swalih|buddy|mate|again|so much|a lot|all|everyone))*"
+_END = r"[\s!.,?:)]*$"
+
+# Rules are anchored so "hi, what projects have you built?" still goes to RAG
+INTENT_RULES: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("greeting", re.compile(
+        rf"^(?:hi+|hello+|hey+|hiya|howdy|yo|greetings|sup|what'?s up"
+        rf"|good (?:morning|afternoon|evening)){_FILLER}{_END}"
+    )),
+    ("identity", re.compile(
+        rf"^(?:who (?:are|r) (?:you|u)|what(?:'s| is) your name"
+        rf"|introduce yourself|are you (?:a bot|an ai|real|human)){_FILLER}{_END}"
+    )),
+    ("wellbeing", re.compile(
+        rf"^(?:(?:hi|hello|hey),? )?(?:how (?:are|r) (?:you|u)(?: doing)?(?: today)?"
+        rf"|how'?s it going|how are things){_FILLER}{_END}"
+    )),
+    ("capabilities", re.compile(
+        rf"^(?:what can (?:you do|i ask(?: you)?)|how does this work"
+        rf"|what should i ask(?: you)?|help){_FILLER}{_END}"
+    )),
+    ("thanks", re.compile(
+        rf"^(?:ok(?:ay)?,? )?(?:thanks|thank you|thank u|thx|ty|cheers"
+        rf"|appreciate it|great,? thanks){_FILLER}{_END}"
+    )),
+    ("farewell", re.compile(
+        rf"^(?:ok(?:ay)?,? )?(?:bye+|goodbye|good bye|see (?:you|ya)(?: later)?"
+        rf"|take care|have a (?:nice|good|great) (?:day|one)){_FILLER}{_END}"
+    )),
+]
+
+# Per-intent hit counters, including RAG fall-through
+_intent_hits: Dict[str, int] = {}
+
+# Lazily embedded examples for nearest-neighbour matching
+_example_vectors: Optional[List[Tuple[str, List[float]]]] = None
+
+# Pre-synthesized audio per persona and intent: {(persona_id, intent): (audio_base64, alignment)}
+_audio_cache: Dict[Tuple[str, str], Tuple[str, SpeechAlignment]] = {}
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase and collapse whitespace for rule matching."""
+    return " ".join(message.lower().split())
+
+
+def match_rules(message: str) -> Optional[str]:
+    """Return the intent whose regex rule matches the message, if any."""
+    normalized = normalize_message(message)
+    for intent, pattern in INTENT_RULES:
+        if pattern.match(normalized):
+            return intent
+    return None
+
+
+async def _get_example_vectors() -> List[Tuple[str, List[float]]]:
+    """Embed the intent examples once and keep them in memory."""
+    global _example_vectors
+    if _example_vectors is None:
+        from app.rag.pipeline import embeddings
+
+        labels = []
+        texts = []
+        for intent, examples in INTENT_EXAMPLES.items():
+            for example in examples:
+                labels.append(intent)
+                texts.append(example)
+
+        vectors = await embeddings.aembed_documents(texts, task_type="RETRIEVAL_QUERY")
+        _example_vectors = list(zip(labels, vectors))
+    return _example_vectors
+
+
+async def match_semantic(message: str) -> Optional[str]:
+    """
+    Match short messages against the intent examples by embedding similarity.
+
+    Disabled unless `intent_similarity_threshold` is set, since it costs
+    one embedding call per short message.
+    """
+    threshold = settings.intent_similarity_threshold
+    if threshold <= 0 or len(message.split()) > SEMANTIC_MAX_WORDS:
+        return None
+
+    try:
+        from app.rag.retrieval import aembed_query
+
+        candidates = await _get_example_vectors()
+        query_vector = await aembed_query(message)
+    except Exception as e:
+        print(f"Intent embedding error: {e}")
+        return None
+
+    best = nearest_neighbour(query_vector, candidates)
+    if best and best[1] >= threshold:
+        return best[0]
+    return None
+
+
+async def classify_intent(message: str) -> Optional[str]:
+    """
+    Classify a message as a small-talk intent.
+
+    Returns the intent name, or None if the message should go to RAG.
+    """
+    from app.utils.timer import timer
+
+    with timer("Intent Routing"):
+        intent = match_rules(message) or await match_semantic(message)
+
+    key = intent or RAG_INTENT
+    _intent_hits[key] = _intent_hits.get(key, 0) + 1
+    return intent
+
+
+async def get_intent_audio(
+    intent: str,
+    persona: Optional[Persona] = None
+) -> Tuple[Optional[str], Optional[SpeechAlignment]]:
+    """
+    Get the synthesized audio for an intent's templated answer,
+    in the persona's voice (default persona if None).
+
+    Audio is generated on first use and cached; failures are not cached
+    so a later request can retry.
+    """
+    persona = persona or get_default_persona()
+    key = (persona.id, intent)
+    if key in _audio_cache:
+        return _audio_cache[key]
+
+    from app.tts.polly import generate_speech_with_alignment
+
+    audio_base64, alignment = await generate_speech_with_alignment(
+        persona.intent_responses[intent], persona.voice_id
+    )
+    if audio_base64:
+        _audio_cache[key] = (audio_base64, alignment)
+    return audio_base64, alignment
+
+
+async def answer_intent(
+    intent: str,
+    question: str,
+    session_id: str = None,
+    persona: Optional[Persona] = None
+) -> Tuple[str, Optional[str], Optional[SpeechAlignment]]:
+    """
+    Answer a routed intent from the persona's template and record the exchange.
+
+    Returns:
+        Tuple of (text, audio_base64, alignment)
+    """
+    persona = persona or get_default_persona()
+    text = persona.intent_responses[intent]
+    audio_base64, alignment = await get_intent_audio(intent, persona)
+
+    if session_id:
+        ChatHistoryManager.add_user_message(session_id, question)
+        ChatHistoryManager.add_ai_message(session_id, text)
+
+    return text, audio_base64, alignment
+
+
+async def warm_intent_audio() -> int:
+    """
+    Pre-synthesize audio for every templated intent of the default persona.
+    Returns the number of intents with cached audio.
+    """
+    for intent in INTENT_RESPONSES:
+        await get_intent_audio(intent)
+    return len(_audio_cache)
+
+
+def get_intent_stats() -> Dict[str, int]:
+    """Get per-intent hit counts (RAG fall-through counted as 'rag')."""
+    return dict(_intent_hits)
@@ -0,0 +1,88 @@
+"""
+Rolling conversation summaries.
+
+After an answer has been sent, the exchanges before the last
+MEMORY_KEEP_TURNS are folded into a short per-session summary with the
+fast model, and ChatHistoryManager then renders the summary plus the
+recent exchanges into the prompt instead of the raw history. Folding is
+off the request path: until a fold finishes the prompt simply carries the
+unfolded messages, and if the model is unavailable nothing is lost, the
+raw history just stays (bounded by MAX_HISTORY_LENGTH as before).
+"""
+import time
+import asyncio
+from typing import Set
+from app.config import get_settings
+from app.prompts.system import SUMMARY_PROMPT
+from app.rag.model_router import ModelRoute, get_llm, llm_breaker, record_llm_call
+from app.services.chat_history import ChatHistoryManager
+from app.utils.resilience import UpstreamUnavailable
+
+settings = get_settings()
+
+# Sessions with a fold in flight; one at a time per session
+_folding: Set[str] = set()
+
+# Fold tasks started outside a request (WebSocket turns); kept so they aren't collected
+_fold_tasks: Set[asyncio.Task] = set()
+
+
+def get_summary_route() -> ModelRoute:
+    """Summaries always go to the fast model; the route name keeps them apart in /stats."""
+    return ModelRoute(
+        name="summary",
+        model=settings.llm_fast_model,
+        max_output_tokens=settings.memory_summary_max_tokens,
+        context_chunks=0,
+    )
+
+
+async def fold_history(session_id: str, assistant_name: str = "Swalih"):
+    """
+    Fold a session's older exchanges into its summary if enough have built up.
+    Never raises: a failed fold leaves the raw history in place.
+    """
+    from app.utils.timer import timer
+
+    if not session_id or session_id in _folding:
+        return
+    folded = ChatHistoryManager.get_messages_to_fold(session_id)
+    if not folded:
+        return
+
+    _folding.add(session_id)
+    try:
+        route = get_summary_route()
+        prompt = SUMMARY_PROMPT.format(
+            assistant_name=assistant_name,
+            summary=ChatHistoryManager.get_summary(session_id) or "(none yet)",
+            messages="\n".join(
+                f"{'Visitor' if role == 'user' else assistant_name}: {content}"
+                for role, content in folded
+            ),
+        )
+        with timer("Fold History (LLM)", model=route.model, messages=len(folded)):
+            start = time.perf_counter()
+            response = await llm_breaker(route.model).call(
+                get_llm(route).ainvoke, prompt, timeout=settings.llm_timeout
+            )
+            record_llm_call(route, time.perf_counter() - start, response.usage_metadata)
+
+        summary = response.content.strip()
+        if summary:
+            ChatHistoryManager.apply_summary(session_id, summary, folded, assistant_name)
+    except UpstreamUnavailable as e:
+        print(f"Not folding history for now ({e})")
+    except Exception as e:
+        print(f"History fold error: {e}")
+    finally:
+        _folding.discard(session_id)
+
+
+def schedule_fold(session_id: str, assistant_name: str = "Swalih"):
+    """Start a fold in the background if one is due (for callers without BackgroundTasks)."""
+    if not ChatHistoryManager.get_messages_to_fold(session_id):
+        return
+    task = asyncio.create_task(fold_history(session_id, assistant_name))
+    _fold_tasks.add(task)
+    task.add_done_callback(_fold_tasks.discard)
@@ -0,0 +1,153 @@
+"""
+Persona registry for hosting several portfolio bots from one deployment.
+
+The built-in default persona is the original single-persona setup
+(SYSTEM_PROMPT, the knowledge/ directory, the default Chroma collection,
+POLLY_VOICE_ID and RATE_LIMIT_PER_DAY). Further personas live under
+`PERSONAS_DIR`, one directory each:
+
+    personas/<persona_id>/
+        persona.json   {"name": "Jane", "voice_id": "Joanna",
+                        "rate_limit_per_day": 20, "intent_responses": {...}}
+        prompt.txt     system prompt with {context}, {chat_history} and {question}
+        knowledge/     markdown files, ingested into the persona's own collection
+
+Personas are read from disk on first use. Sessions, rate limits, intent
+audio and cached response bodies are keyed by persona so nothing leaks
+between them.
+"""
+import re
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.config import get_settings
+from app.prompts.intents import INTENT_RESPONSES
+from app.prompts.system import SYSTEM_PROMPT
+from app.rag.ingest import KNOWLEDGE_DIR
+
+settings = get_settings()
+
+DEFAULT_PERSONA_ID = "default"
+
+# LangChain's default collection, where the default persona's chunks already live
+DEFAULT_COLLECTION = "langchain"
+
+# Persona ids double as directory and Chroma collection names
+PERSONA_ID_PATTERN = re.compile(r"^[a-z0-9](?:[a-z0-9_-]{0,46}[a-z0-9])?$")
+
+PROMPT_VARIABLES = ("{context}", "{chat_history}", "{question}")
+
+
+class UnknownPersonaError(KeyError):
+    """No persona is registered under the requested id."""
+
+
+@dataclass(frozen=True)
+class Persona:
+    """Everything that differs between hosted bots."""
+    id: str
+    name: str
+    system_prompt: str
+    knowledge_dir: Path
+    collection: str
+    voice_id: str
+    rate_limit_per_day: int
+    intent_responses: Dict[str, str] = field(default_factory=dict)
+    # Only the default persona has a precomputed answer bank
+    answer_bank: bool = False
+
+    @property
+    def is_default(self) -> bool:
+        return self.id == DEFAULT_PERSONA_ID
+
+    def scoped_key(self, key: Optional[str]) -> Optional[str]:
+        """Namespace a session id or rate limit key (unchanged for the default persona)."""
+        if key is None or self.is_default:
+            return key
+        return f"{self.id}:{key}"
+
+
+# Loaded personas by id
+_personas: Dict[str, Persona] = {}
+
+
+def get_default_persona() -> Persona:
+    """The original single-persona configuration."""
+    if DEFAULT_PERSONA_ID not in _personas:
+        _personas[DEFAULT_PERSONA_ID] = Persona(
+            id=DEFAULT_PERSONA_ID,
+            name="Swalih",
+            system_prompt=SYSTEM_PROMPT,
+            knowledge_dir=KNOWLEDGE_DIR,
+            collection=DEFAULT_COLLECTION,
+            voice_id=settings.polly_voice_id,
+            rate_limit_per_day=settings.rate_limit_per_day,
+            intent_responses=dict(INTENT_RESPONSES),
+            answer_bank=True,
+        )
+    return _personas[DEFAULT_PERSONA_ID]
+
+
+def _load_persona(persona_id: str) -> Persona:
+    """Read a persona directory from disk."""
+    persona_dir = Path(settings.personas_dir) / persona_id
+    config_path = persona_dir / "persona.json"
+    if not PERSONA_ID_PATTERN.match(persona_id) or not config_path.exists():
+        raise UnknownPersonaError(persona_id)
+
+    config = json.loads(config_path.read_text(encoding="utf-8"))
+    system_prompt = (persona_dir / "prompt.txt").read_text(encoding="utf-8")
+    missing = [name for name in PROMPT_VARIABLES if name not in system_prompt]
+    if missing:
+        raise ValueError(f"Persona '{persona_id}' prompt is missing {', '.join(missing)}")
+
+    # Small-talk templates are persona specific; only the neutral
+    # "unavailable" reply is inherited
+    intent_responses = {"unavailable": INTENT_RESPONSES["unavailable"]}
+    intent_responses.update(config.get("intent_responses", {}))
+
+    return Persona(
+        id=persona_id,
+        name=config.get("name", persona_id),
+        system_prompt=system_prompt,
+        knowledge_dir=persona_dir / "knowledge",
+        collection=f"persona-{persona_id}",
+        voice_id=config.get("voice_id", settings.polly_voice_id),
+        rate_limit_per_day=config.get("rate_limit_per_day", settings.rate_limit_per_day),
+        intent_responses=intent_responses,
+    )
+
+
+def get_persona(persona_id: Optional[str] = None) -> Persona:
+    """
+    Get a persona by id, loading it on first use.
+    No id means the default persona.
+
+    Raises:
+        UnknownPersonaError: no persona directory for the id
+    """
+    if not persona_id or persona_id == DEFAULT_PERSONA_ID:
+        return get_default_persona()
+    if persona_id not in _personas:
+        _personas[persona_id] = _load_persona(persona_id)
+    return _personas[persona_id]
+
+
+def reset_persona(persona_id: str):
+    """Forget a loaded persona so its files are re-read on next use."""
+    if persona_id != DEFAULT_PERSONA_ID:
+        _personas.pop(persona_id, None)
+
+
+def list_persona_ids() -> List[str]:
+    """Ids of every configured persona, default first."""
+    ids = [DEFAULT_PERSONA_ID]
+    personas_dir = Path(settings.personas_dir)
+    if personas_dir.exists():
+        ids.extend(sorted(
+            path.parent.name for path in personas_dir.glob("*/persona.json")
+            if PERSONA_ID_PATTERN.match(path.parent.name)
+            and path.parent.name != DEFAULT_PERSONA_ID
+        ))
+    return ids
@@ -0,0 +1,76 @@
+"""
+MP3 helpers for stitching Polly audio segments.
+
+Polly returns plain MPEG audio frames, so segments with the same voice and
+sample rate can be concatenated byte-wise. To rebase speech marks onto the
+stitched stream we need each segment's duration, which we get by walking
+the frame headers instead of decoding.
+"""
+from typing import Optional, Tuple
+
+# Layer III bitrates in kbps, indexed by the header's bitrate index
+_BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Sample rates by MPEG version bits (3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5)
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+
+def _skip_id3(data: bytes) -> int:
+    """Return the offset of the first byte after an ID3v2 tag, if present."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_frame_header(header: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    Parse a 4-byte Layer III frame header.
+
+    Returns:
+        Tuple of (frame_length, samples, sample_rate) or None if invalid
+    """
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        bitrate = _BITRATES_MPEG1[bitrate_index] * 1000
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+
+    bitrate = _BITRATES_MPEG2[bitrate_index] * 1000
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+def mp3_duration(data: bytes) -> float:
+    """Get the playback duration of an MP3 stream in seconds."""
+    offset = _skip_id3(data)
+    duration = 0.0
+
+    while offset + 4 <= len(data):
+        frame = _parse_frame_header(data[offset:offset + 4])
+        if frame is None:
+            # Resynchronize on the next byte
+            offset += 1
+            continue
+
+        frame_length, samples, sample_rate = frame
+        duration += samples / sample_rate
+        offset += frame_length
+
+    return duration
@@ -0,0 +1,134 @@
+"""
+Speculative (pipelined) TTS.
+
+Consumes the LLM output as a stream, cuts it into sentences and submits
+each completed sentence to Polly while the rest of the answer is still
+being generated. The MP3 segments are stitched in order and their speech
+marks rebased onto the combined stream, so callers still get a single
+(text, audio, alignment) result in roughly max(LLM, TTS) time instead of
+LLM + TTS.
+"""
+import re
+import base64
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+from app.api.schemas import SpeechAlignment, VisemeMark, WordMark
+from app.tts.audio import mp3_duration
+from app.tts.polly import synthesize_speech, parse_speech_marks
+
+# Sentence boundary: terminal punctuation, optional closing quote/bracket, whitespace
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+# Short sentences are merged with the next one to avoid tiny Polly calls
+MIN_SEGMENT_CHARS = 20
+
+
+class SentenceSegmenter:
+    """
+    Incrementally split streamed text into sentence-sized segments.
+    """
+
+    def __init__(self, min_chars: int = MIN_SEGMENT_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any segments completed by it."""
+        self._buffer += text
+        segments = []
+        start = 0
+
+        for match in SENTENCE_END.finditer(self._buffer):
+            if match.end() - start >= self.min_chars:
+                segments.append(self._buffer[start:match.end()].strip())
+                start = match.end()
+
+        self._buffer = self._buffer[start:]
+        return segments
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream has ended."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+def stitch_segments(
+    segments: List[Tuple[bytes, str]]
+) -> Tuple[str, SpeechAlignment]:
+    """
+    Concatenate MP3 segments and merge their speech marks.
+
+    Each segment's marks are shifted by the total duration of the
+    segments before it.
+
+    Returns:
+        Tuple of (base64_audio, alignment)
+    """
+    visemes: List[VisemeMark] = []
+    words: List[WordMark] = []
+    offset = 0.0
+
+    for audio, speech_marks_data in segments:
+        segment_visemes, segment_words = parse_speech_marks(speech_marks_data)
+        visemes.extend(
+            VisemeMark(time=round(mark.time + offset, 3), viseme=mark.viseme) for mark in segment_visemes
+        )
+        words.extend(
+            WordMark(time=round(mark.time + offset, 3), value=mark.value) for mark in segment_words
+        )
+        offset += mp3_duration(audio)
+
+    audio_base64 = base64.b64encode(b"".join(audio for audio, _ in segments)).decode('utf-8')
+    return audio_base64, SpeechAlignment(visemes=visemes, words=words)
+
+
+async def generate_speech_pipelined(
+    chunks: AsyncIterator[str],
+    voice_id: Optional[str] = None
+) -> Tuple[str, Optional[str], Optional[SpeechAlignment]]:
+    """
+    Consume a text stream, synthesizing sentences as soon as they complete.
+
+    Returns:
+        Tuple of (text, base64_audio, alignment). Audio and alignment are
+        None if Polly is not configured or any segment failed.
+    """
+    from app.utils.timer import timer
+
+    segmenter = SentenceSegmenter()
+    tasks: List[asyncio.Task] = []
+    parts = []
+
+    try:
+        with timer("Pipelined LLM Stream"):
+            async for chunk in chunks:
+                parts.append(chunk)
+                for segment in segmenter.feed(chunk):
+                    tasks.append(asyncio.create_task(synthesize_speech(segment, voice_id)))
+
+        rest = segmenter.flush()
+        if rest:
+            tasks.append(asyncio.create_task(synthesize_speech(rest, voice_id)))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    text = "".join(parts)
+    if not tasks:
+        return text, None, None
+
+    with timer("Pipelined TTS Tail"):
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Polly TTS Error: {result}")
+            return text, None, None
+        if result is None:
+            # Polly not configured
+            return text, None, None
+
+    audio_base64, alignment = stitch_segments(results)
+    return text, audio_base64, alignment
@@ -6,22 +6,42 @@ for lip-sync animation in the Rive character.
 """
 import base64
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, List
 from app.config import get_settings
 from app.api.schemas import SpeechAlignment, VisemeMark, WordMark
+from app.utils.resilience import UpstreamUnavailable, get_breaker
 
 settings = get_settings()
 
+# Breaker name for Polly calls (see app.utils.resilience)
+POLLY_UPSTREAM = "polly"
+
+# Bounded pool for the blocking boto3 calls, so a slow Polly can't
+# exhaust the default executor shared with everything else
+_polly_executor = ThreadPoolExecutor(
+    max_workers=settings.polly_max_workers,
+    thread_name_prefix="polly"
+)
+
 # Initialize Polly client only if AWS credentials are configured
 polly_client = None
 if settings.aws_access_key_id and settings.aws_secret_access_key:
     try:
         import boto3
+        from botocore.config import Config
         polly_client = boto3.client(
             'polly',
             aws_access_key_id=settings.aws_access_key_id,
             aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region
+            region_name=settings.aws_region,
+            # Fail within the request deadline instead of botocore's 60s default
+            config=Config(
+                connect_timeout=2,
+                read_timeout=settings.polly_timeout,
+                retries={"max_attempts": 2, "mode": "standard"},
+                max_pool_connections=settings.polly_max_workers
+            )
         )
         print(f"Amazon Polly client initialized (region: {settings.aws_region})")
     except Exception as e:
@@ -63,63 +83,98 @@ def parse_speech_marks(speech_marks_data: str) -> Tuple[List[VisemeMark], List[W
     return visemes, words
 
 
-async def generate_speech_with_alignment(
-    text: str
-) -> Tuple[Optional[str], Optional[SpeechAlignment]]:
+async def synthesize_speech(
+    text: str,
+    voice_id: Optional[str] = None
+) -> Optional[Tuple[bytes, str]]:
     """
-    Generate speech audio with viseme alignment for lip-sync.
+    Synthesize raw MP3 audio and speech marks for a piece of text,
+    in `voice_id` (default `polly_voice_id`).
     
     Amazon Polly requires two separate API calls:
     1. One for the audio stream
     2. One for the speech marks (visemes + words)
     
+    Both calls share one deadline (`polly_timeout`) and go through the
+    Polly circuit breaker.
+    
     Returns:
-        Tuple of (base64_audio, alignment) or (None, None) on error
+        Tuple of (mp3_bytes, speech_marks_data) or None if Polly is not configured
+    
+    Raises:
+        UpstreamUnavailable: Polly failed, timed out or its breaker is open
     """
     from app.utils.timer import timer
     
     if not polly_client:
-        # Return empty if no AWS credentials configured
-        return None, None
+        return None
+    voice_id = voice_id or settings.polly_voice_id
     
-    try:
-        # Helper function for threaded execution
-        def get_audio():
-            with timer("Polly - Generate Audio"):
-                response = polly_client.synthesize_speech(
-                    Engine=settings.polly_engine,
-                    OutputFormat='mp3',
-                    SampleRate='24000',
-                    Text=text,
-                    TextType='text',
-                    VoiceId=settings.polly_voice_id
-                )
-                return response['AudioStream'].read()
+    # Helper function for threaded execution
+    def get_audio():
+        with timer("Polly - Generate Audio", text_chars=len(text)) as audio_span:
+            response = polly_client.synthesize_speech(
+                Engine=settings.polly_engine,
+                OutputFormat='mp3',
+                SampleRate='24000',
+                Text=text,
+                TextType='text',
+                VoiceId=voice_id
+            )
+            audio = response['AudioStream'].read()
+            audio_span.set_attribute("audio_bytes", len(audio))
+            return audio
 
-        def get_marks():
-            with timer("Polly - Get Speech Marks"):
-                response = polly_client.synthesize_speech(
-                    Engine=settings.polly_engine,
-                    OutputFormat='json',
-                    Text=text,
-                    TextType='text',
-                    VoiceId=settings.polly_voice_id,
-                    SpeechMarkTypes=['viseme']
-                )
-                return response['AudioStream'].read().decode('utf-8')
+    def get_marks():
+        with timer("Polly - Get Speech Marks", text_chars=len(text)) as marks_span:
+            response = polly_client.synthesize_speech(
+                Engine=settings.polly_engine,
+                OutputFormat='json',
+                Text=text,
+                TextType='text',
+                VoiceId=voice_id,
+                SpeechMarkTypes=['viseme']
+            )
+            marks = response['AudioStream'].read().decode('utf-8')
+            marks_span.set_attribute("marks_bytes", len(marks))
+            return marks
 
-        # Run both requests in parallel threads (boto3 is blocking)
-        import asyncio
-        import functools
-        
-        loop = asyncio.get_running_loop()
-        
+    # Run both requests in parallel threads (boto3 is blocking)
+    import asyncio
+    from app.utils.tracing import run_in_executor
+    
+    async def get_both():
         # Execute in thread pool to avoid blocking the async loop
-        audio_future = loop.run_in_executor(None, get_audio)
-        marks_future = loop.run_in_executor(None, get_marks)
+        # (the tracing helper keeps each call's span under the caller's)
+        audio_future = run_in_executor(_polly_executor, get_audio)
+        marks_future = run_in_executor(_polly_executor, get_marks)
         
         # Wait for both to complete
-        audio_stream, speech_marks_data = await asyncio.gather(audio_future, marks_future)
+        return await asyncio.gather(audio_future, marks_future)
+    
+    breaker = get_breaker(POLLY_UPSTREAM, slow_call_seconds=settings.polly_slow_call_ms / 1000)
+    audio_stream, speech_marks_data = await breaker.call(get_both, timeout=settings.polly_timeout)
+    return audio_stream, speech_marks_data
+
+
+async def generate_speech_with_alignment(
+    text: str,
+    voice_id: Optional[str] = None
+) -> Tuple[Optional[str], Optional[SpeechAlignment]]:
+    """
+    Generate speech audio with viseme alignment for lip-sync.
+    
+    Returns:
+        Tuple of (base64_audio, alignment) or (None, None) on error,
+        so the caller answers text-only
+    """
+    try:
+        result = await synthesize_speech(text, voice_id)
+        if result is None:
+            # Return empty if no AWS credentials configured
+            return None, None
+        
+        audio_stream, speech_marks_data = result
         
         # Process results
         audio_base64 = base64.b64encode(audio_stream).decode('utf-8')
@@ -132,6 +187,9 @@ async def generate_speech_with_alignment(
         
         return audio_base64, alignment
         
+    except UpstreamUnavailable as e:
+        print(f"Polly unavailable, answering text-only ({e})")
+        return None, None
     except Exception as e:
         print(f"Polly TTS Error: {e}")
         return None, None
@@ -3,7 +3,7 @@ Simple in-memory rate limiter.
 Resets on server restart.
 """
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional
 from app.config import get_settings
 
 settings = get_settings()
@@ -13,13 +13,16 @@ settings = get_settings()
 rate_limit_storage: Dict[str, dict] = {}
 
 
-def check_rate_limit(identifier: str) -> bool:
+def check_rate_limit(identifier: str, limit: Optional[int] = None) -> bool:
     """
     Check if the given identifier (IP or session) is within rate limits.
+    `limit` overrides the daily limit (e.g. per persona).
     
     Returns True if request is allowed, False if rate limited.
     """
     now = datetime.now()
+    if limit is None:
+        limit = settings.rate_limit_per_day
     
     if identifier not in rate_limit_storage:
         # First request from this identifier
@@ -40,22 +43,24 @@ def check_rate_limit(identifier: str) -> bool:
         return True
     
     # Check if under limit
-    if entry["count"] < settings.rate_limit_per_day:
+    if entry["count"] < limit:
         entry["count"] += 1
         return True
     
     return False
 
 
-def get_remaining_requests(identifier: str) -> int:
+def get_remaining_requests(identifier: str, limit: Optional[int] = None) -> int:
     """Get the number of remaining requests for an identifier."""
+    if limit is None:
+        limit = settings.rate_limit_per_day
     if identifier not in rate_limit_storage:
-        return settings.rate_limit_per_day
+        return limit
     
     entry = rate_limit_storage[identifier]
     now = datetime.now()
     
     if now >= entry["reset_time"]:
-        return settings.rate_limit_per_day
+        return limit
     
-    return max(0, settings.rate_limit_per_day - entry["count"])
+    return max(0, limit - entry["count"])
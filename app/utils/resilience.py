@@ -0,0 +1,280 @@
+"""
+Resilience for upstream calls (Gemini LLM, Gemini embeddings, Polly).
+
+Each upstream gets a circuit breaker that trips on a high error rate or
+a high rate of slow calls over its last N calls. While a breaker is open
+calls fail immediately with `CircuitOpenError` instead of waiting on a
+sick upstream; after a cool-down a single probe call is let through and
+its outcome closes or re-opens the breaker. Calls also get a deadline,
+and LLM calls can be hedged (a second identical request is started if
+the first hasn't answered in time, and whichever finishes first wins).
+
+Callers degrade on `UpstreamUnavailable`: TTS falls back to a text-only
+answer and the LLM to a banked or "try again" answer.
+"""
+import time
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from app.config import get_settings
+
+settings = get_settings()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream call failed, timed out or was refused by its breaker."""
+
+    def __init__(self, upstream: str, message: str):
+        super().__init__(f"{upstream}: {message}")
+        self.upstream = upstream
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The upstream's breaker is open; the call was not attempted."""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """The upstream didn't answer within its deadline."""
+
+
+class UpstreamError(UpstreamUnavailable):
+    """The upstream call raised an error."""
+
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker driven by error rate and slow-call rate.
+
+    `clock` is injectable so state transitions can be driven without
+    waiting out real cool-downs.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slow_call_seconds: Optional[float] = None,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        slow_call_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls or settings.breaker_min_calls
+        self.failure_rate = failure_rate or settings.breaker_failure_rate
+        self.slow_call_rate = slow_call_rate or settings.breaker_slow_call_rate
+        self.open_seconds = open_seconds or settings.breaker_open_seconds
+        self.clock = clock
+
+        # Recent call outcomes as (failed, slow)
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window or settings.breaker_window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state; an open breaker turns half-open after its cool-down."""
+        if self._state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now (claims the probe when half-open)."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, latency: float, failed: bool):
+        """Record a call outcome and update the breaker state."""
+        slow = self.slow_call_seconds is not None and latency >= self.slow_call_seconds
+
+        if self._state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self._state = CLOSED
+                self._outcomes.clear()
+            self._probe_in_flight = False
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if (failures / len(self._outcomes) >= self.failure_rate
+                or slow_calls / len(self._outcomes) >= self.slow_call_rate):
+            self._open()
+
+    def release_probe(self):
+        """Give up a half-open probe without an outcome (e.g. the caller was cancelled)."""
+        self._probe_in_flight = False
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.times_opened += 1
+        print(f"Circuit breaker '{self.name}' opened for {self.open_seconds:.0f}s")
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Await `func(*args)` under the breaker with an optional deadline.
+
+        Raises CircuitOpenError without calling `func` while open;
+        timeouts and errors are recorded and re-raised as
+        DeadlineExceeded / UpstreamError.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, "circuit open")
+
+        start = self.clock()
+        try:
+            result = await asyncio.wait_for(func(*args), timeout)
+        except asyncio.TimeoutError:
+            self.record(self.clock() - start, failed=True)
+            raise DeadlineExceeded(self.name, f"no response within {timeout:.1f}s")
+        except asyncio.CancelledError:
+            self.release_probe()
+            raise
+        except UpstreamUnavailable:
+            self.record(self.clock() - start, failed=True)
+            raise
+        except Exception as e:
+            self.record(self.clock() - start, failed=True)
+            raise UpstreamError(self.name, str(e)) from e
+
+        self.record(self.clock() - start, failed=False)
+        return result
+
+    async def stream(
+        self,
+        iterator: AsyncIterator[Any],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Re-yield an upstream stream under the breaker.
+
+        `timeout` applies to each item, so a stream that stalls mid-answer
+        fails like a slow call. The outcome is recorded once the stream
+        ends; a stream abandoned by the consumer records nothing.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, "circuit open")
+
+        start = self.clock()
+        failed = None
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    failed = True
+                    raise DeadlineExceeded(self.name, f"stream stalled for {timeout:.1f}s")
+                except UpstreamUnavailable:
+                    failed = True
+                    raise
+                except Exception as e:
+                    failed = True
+                    raise UpstreamError(self.name, str(e)) from e
+                yield item
+            failed = False
+        finally:
+            if failed is None:
+                self.release_probe()
+            else:
+                self.record(self.clock() - start, failed=failed)
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    def stats(self) -> dict:
+        """Current state and recent error / slow-call rates."""
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": calls,
+            "failure_rate": round(sum(1 for f, _ in self._outcomes if f) / calls, 2) if calls else 0.0,
+            "slow_call_rate": round(sum(1 for _, s in self._outcomes if s) / calls, 2) if calls else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+# Breakers per upstream name, created on first use
+_breakers: Dict[str, CircuitBreaker] = {}
+
+# Hedging counters per upstream: {name: {"hedged": n, "hedge_won": n}}
+_hedge_stats: Dict[str, Dict[str, int]] = {}
+
+
+def get_breaker(name: str, slow_call_seconds: Optional[float] = None) -> CircuitBreaker:
+    """Get the breaker for an upstream, creating it on first use."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, slow_call_seconds=slow_call_seconds)
+    return _breakers[name]
+
+
+async def hedged(
+    name: str,
+    func: Callable[[], Awaitable[Any]],
+    delay: float
+) -> Any:
+    """
+    Await `func()`, starting a second attempt if the first takes longer
+    than `delay` seconds. Returns the first successful result and cancels
+    the other attempt; raises the first attempt's error if both fail.
+    """
+    first = asyncio.ensure_future(func())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return first.result()
+
+        counters = _hedge_stats.setdefault(name, {"hedged": 0, "hedge_won": 0})
+        counters["hedged"] += 1
+        second = asyncio.ensure_future(func())
+        tasks.add(second)
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        counters["hedge_won"] += 1
+                    return task.result()
+        return first.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def get_resilience_stats() -> dict:
+    """Get breaker states and hedging counters for every upstream."""
+    return {
+        "breakers": {name: breaker.stats() for name, breaker in _breakers.items()},
+        "hedging": {name: dict(counters) for name, counters in _hedge_stats.items()},
+    }
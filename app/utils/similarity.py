@@ -0,0 +1,33 @@
+"""
+Small vector helpers for matching against in-memory embedding sets.
+"""
+import math
+from typing import List, Optional, Sequence, Tuple
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity between two vectors (0.0 if either is all zeros)."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def nearest_neighbour(
+    query: Sequence[float],
+    candidates: List[Tuple[str, Sequence[float]]]
+) -> Optional[Tuple[str, float]]:
+    """
+    Find the candidate closest to the query vector.
+
+    Returns:
+        Tuple of (label, similarity) or None if there are no candidates
+    """
+    best = None
+    for label, vector in candidates:
+        score = cosine_similarity(query, vector)
+        if best is None or score > best[1]:
+            best = (label, score)
+    return best
@@ -13,20 +13,30 @@ if not logger.handlers:
     logger.setLevel(logging.INFO)
 
 @contextmanager
-def timer(label: str):
+def timer(label: str, **attributes):
     """
     Context manager to time a block of code.
+    The block is also traced as a span (see app.utils.tracing), with any
+    keyword arguments recorded as span attributes.
     Usage:
-        with timer("My Operation"):
+        with timer("My Operation", items=3) as span:
             # do something
+            span.set_attribute("result_size", 42)
     """
+    from app.utils.tracing import span
+    
     start_time = time.time()
     try:
-        yield
+        with span(label, **attributes) as current_span:
+            yield current_span
     finally:
         end_time = time.time()
         duration = end_time - start_time
-        logger.info(f"{label}: {duration:.4f}s")
+        if attributes:
+            details = ", ".join(f"{key}={value}" for key, value in attributes.items())
+            logger.info(f"{label} [{details}]: {duration:.4f}s")
+        else:
+            logger.info(f"{label}: {duration:.4f}s")
 
 def time_execution(label: str = None):
     """
@@ -0,0 +1,176 @@
+"""
+Span-based request tracing.
+
+Uses OpenTelemetry when it is installed and `TRACING_EXPORTER` is set;
+otherwise spans are no-ops and cost next to nothing. Every `timer` block
+is also a span, so the chat pipeline (rate limit, history, embed, search,
+LLM, each Polly call, encoding) shows up as one parent/child tree per
+request.
+
+Exporters:
+    console - OpenTelemetry's console exporter (one JSON blob per span)
+    file    - JSON lines in `TRACING_FILE`, readable by scripts/trace_waterfall.py
+"""
+import json
+import asyncio
+import functools
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+# OpenTelemetry is optional; without it tracing is disabled
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+except ImportError:
+    trace = None
+    SpanExporter = object
+
+SERVICE_NAME = "swalih-chatbot-api"
+
+_tracer = None
+
+
+class _NoopSpan:
+    """Stand-in span used when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: dict):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Export finished spans as JSON lines to a local file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> "SpanExportResult":
+        lines = []
+        for span in spans:
+            context = span.get_span_context()
+            lines.append(json.dumps({
+                "trace_id": format(context.trace_id, "032x"),
+                "span_id": format(context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "name": span.name,
+                "start_ns": span.start_time,
+                "end_ns": span.end_time,
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {}),
+            }))
+
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Failed to write traces: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def setup_tracing() -> bool:
+    """
+    Configure the tracer from settings.
+    Returns True if tracing is enabled.
+    """
+    global _tracer
+    if _tracer is not None:
+        return True
+
+    exporter_name = settings.tracing_exporter.lower()
+    if not exporter_name:
+        return False
+    if trace is None:
+        print("Tracing requested but opentelemetry-sdk is not installed")
+        return False
+
+    if exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    elif exporter_name == "file":
+        exporter = JsonLinesSpanExporter(settings.tracing_file)
+    else:
+        print(f"Unknown tracing exporter '{exporter_name}', tracing disabled")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(__name__)
+    print(f"Tracing enabled ({exporter_name} exporter)")
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans (called on app shutdown)."""
+    if _tracer is not None:
+        trace.get_tracer_provider().shutdown()
+
+
+@contextmanager
+def span(name: str, attach: bool = True, **attributes):
+    """
+    Open a span as a child of the current one.
+    Yields the span so callers can add attributes as they learn them.
+
+    Pass `attach=False` for spans held open across `yield` in an async
+    generator: the span is still parented correctly but isn't made
+    current, so work the consumer does between chunks isn't nested in it.
+    """
+    if _tracer is None:
+        yield _NOOP_SPAN
+        return
+
+    if attach:
+        with _tracer.start_as_current_span(name) as current:
+            if attributes:
+                current.set_attributes(_clean_attributes(attributes))
+            yield current
+        return
+
+    detached = _tracer.start_span(name, attributes=_clean_attributes(attributes))
+    try:
+        yield detached
+    except Exception as e:
+        detached.record_exception(e)
+        detached.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        detached.end()
+
+
+def _clean_attributes(attributes: dict) -> dict:
+    """Drop None values, which OpenTelemetry rejects."""
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+def run_in_executor(executor: Optional[Any], func, *args):
+    """
+    `loop.run_in_executor` that carries the current context into the thread,
+    so spans opened inside `func` are children of the caller's span.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return loop.run_in_executor(executor, functools.partial(context.run, func, *args))
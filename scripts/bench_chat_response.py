@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: FastAPI response_model path vs the fast chat response path.
+
+Builds a realistic chat answer (base64 MP3 plus a few hundred viseme
+marks) and times:
+  - current:  FastAPI re-validating the ChatResponse against response_model
+              and rendering it with JSONResponse
+  - fast:     app.api.responses.chat_json_response (orjson, no re-validation)
+  - static:   app.api.responses.static_chat_json_response on a cache hit
+Each is measured with and without an Accept-Encoding that allows compression.
+
+Usage:
+  python scripts/bench_chat_response.py [--audio-kb 120] [--visemes 400] [--iterations 500]
+"""
+import sys
+import time
+import base64
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api import responses  # noqa: E402
+from app.api.schemas import ChatResponse, SpeechAlignment, VisemeMark, WordMark  # noqa: E402
+
+VISEMES = ["p", "t", "k", "f", "T", "s", "S", "r", "a", "e", "i", "o", "u", "sil"]
+
+
+def build_answer(audio_kb: int, viseme_count: int):
+    """Build a chat answer shaped like a typical Polly-backed response."""
+    text = "I'm a frontend engineer who loves building immersive web experiences. " * 4
+    # Random bytes compress about as poorly as real MP3 data
+    audio_base64 = base64.b64encode(random.Random(0).randbytes(audio_kb * 1024)).decode("utf-8")
+    alignment = SpeechAlignment(
+        visemes=[VisemeMark(time=i * 0.06, viseme=VISEMES[i % len(VISEMES)]) for i in range(viseme_count)],
+        words=[WordMark(time=i * 0.3, value=f"word{i}") for i in range(viseme_count // 5)],
+    )
+    return text, audio_base64, alignment
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    """Run fn repeatedly and print mean time per call in milliseconds."""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        size = len(fn())
+    mean_ms = (time.perf_counter() - start) / iterations * 1000
+    print(f"{label:<34}{mean_ms:>9.3f} ms{size / 1024:>11.1f} KB")
+    return mean_ms
+
+
+def main(args):
+    text, audio_base64, alignment = build_answer(args.audio_kb, args.visemes)
+    route = APIRoute("/chat", endpoint=lambda: None, response_model=ChatResponse)
+    loop = asyncio.new_event_loop()
+
+    def current():
+        # What FastAPI does when the endpoint returns a ChatResponse
+        content = loop.run_until_complete(serialize_response(
+            field=route.response_field,
+            response_content=ChatResponse(text=text, audio_base64=audio_base64, alignment=alignment),
+        ))
+        return JSONResponse(content).body
+
+    def fast(accept_encoding=None):
+        return lambda: responses.chat_json_response(text, audio_base64, alignment, accept_encoding).body
+
+    def static(accept_encoding=None):
+        return lambda: responses.static_chat_json_response(text, audio_base64, alignment, accept_encoding).body
+
+    print(f"Answer: {args.audio_kb} KB audio, {args.visemes} visemes, {args.iterations} iterations\n")
+    print(f"{'path':<34}{'per call':>12}{'body':>14}")
+
+    baseline = bench("current (response_model)", current, args.iterations)
+    fast_ms = bench("fast", fast(), args.iterations)
+    # Fresh answers with audio are sent uncompressed, so this matches "fast"
+    bench("fast (gzip accepted)", fast("gzip"), args.iterations)
+    bench("static (cached)", static(), args.iterations)
+    bench("static (cached) + gzip", static("gzip"), args.iterations)
+    if responses.brotli is not None:
+        bench("static (cached) + br", static("br"), args.iterations)
+
+    print(f"\nfast path speedup (uncompressed): {baseline / fast_ms:.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--audio-kb", type=int, default=120)
+    parser.add_argument("--visemes", type=int, default=400)
+    parser.add_argument("--iterations", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Check that concurrent retrievals don't block the event loop.
+
+Runs N chats' retrieval step at the same time while a ticker task
+measures how late the event loop wakes it up. Compares the old
+synchronous path (`retriever.invoke()` on the loop thread) with the
+async retrieval layer in app/rag/retrieval.py.
+
+Runs fully offline:
+  - the Gemini embedding endpoint is replaced by an httpx mock transport
+    that answers after a simulated network delay
+  - the vector store is a fake whose search blocks its thread for a
+    fixed time, like a Chroma query does
+
+Usage:
+  python scripts/check_event_loop_lag.py [--chats 20] [--embed-ms 150] [--search-ms 30]
+
+Exits with status 1 if the async path's worst lag exceeds --max-lag-ms.
+"""
+import sys
+import time
+import logging
+import asyncio
+import argparse
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.rag import retrieval  # noqa: E402
+from app.utils.timer import logger as timer_logger  # noqa: E402
+
+FAKE_DIMENSIONS = 8
+
+
+class FakeVectorStore:
+    """Vector store whose search blocks the calling thread."""
+
+    def __init__(self, search_seconds: float):
+        self.search_seconds = search_seconds
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k):
+        time.sleep(self.search_seconds)
+        return []
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    """Record how late each tick fires, in milliseconds."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+    return lags
+
+
+async def run_scenario(name: str, retrieve, chats: int) -> dict:
+    """Run `chats` concurrent retrievals and report loop lag and wall time."""
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0.02)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(retrieve(f"question {i}") for i in range(chats)))
+    wall = time.perf_counter() - start
+
+    stop.set()
+    lags = sorted(await monitor)
+    return {
+        "name": name,
+        "wall_s": wall,
+        "max_lag_ms": lags[-1] if lags else 0.0,
+        "p99_lag_ms": lags[int(len(lags) * 0.99)] if lags else 0.0,
+    }
+
+
+async def main(args) -> int:
+    embed_seconds = args.embed_ms / 1000
+    vectorstore = FakeVectorStore(args.search_ms / 1000)
+
+    async def embed_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(embed_seconds)
+        return httpx.Response(200, json={"embedding": {"values": [0.1] * FAKE_DIMENSIONS}})
+
+    retrieval._http_client = httpx.AsyncClient(
+        base_url=retrieval.GEMINI_API_URL,
+        transport=httpx.MockTransport(embed_handler)
+    )
+
+    async def sync_retrieve(query):
+        # What retriever.invoke() does: blocking embed + blocking search on the loop
+        time.sleep(embed_seconds)
+        return vectorstore.similarity_search_by_vector_with_relevance_scores(
+            [0.1] * FAKE_DIMENSIONS, retrieval.RETRIEVAL_K
+        )
+
+    async def async_retrieve(query):
+        return await retrieval.aretrieve(vectorstore, query)
+
+    # Keep the per-call timer logs out of the report
+    timer_logger.setLevel(logging.WARNING)
+
+    results = [
+        await run_scenario("sync (retriever.invoke)", sync_retrieve, args.chats),
+        await run_scenario("async (aretrieve)", async_retrieve, args.chats),
+    ]
+    await retrieval.close_http_client()
+
+    print(f"{args.chats} concurrent retrievals "
+          f"(embed {args.embed_ms:.0f}ms, search {args.search_ms:.0f}ms, "
+          f"{retrieval.settings.retrieval_max_workers} search workers)\n")
+    print(f"{'path':<26}{'wall':>10}{'max lag':>12}{'p99 lag':>12}")
+    for r in results:
+        print(f"{r['name']:<26}{r['wall_s']:>9.2f}s{r['max_lag_ms']:>10.1f}ms{r['p99_lag_ms']:>10.1f}ms")
+
+    if results[1]["max_lag_ms"] > args.max_lag_ms:
+        print(f"\n❌ Async path lag exceeded {args.max_lag_ms:.0f}ms")
+        return 1
+    print(f"\n✅ Async path lag stayed under {args.max_lag_ms:.0f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--embed-ms", type=float, default=150)
+    parser.add_argument("--search-ms", type=float, default=30)
+    parser.add_argument("--max-lag-ms", type=float, default=50)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Check circuit breakers, deadlines, hedging and degradation with faulty fakes.
+
+Runs fully offline against the real /api/chat route:
+  - the Gemini embedding endpoint is an httpx mock transport
+  - the vector store is a fake returning one relevant chunk
+  - the LLM is a fake whose latency and error rate can be changed
+  - the Polly client is a fake whose latency and error rate can be changed
+
+Scenarios:
+  breaker     breaker state machine driven by an injected clock
+  polly-hang  Polly hangs: answers go text-only within the deadline, then
+              immediately once the breaker opens
+  llm-down    Gemini errors: answers degrade to the "try again" template
+              and the LLM stops being called once the breaker opens
+  hedging     heavy-tailed LLM latency: p95 with and without hedging
+
+Usage:
+  python scripts/check_resilience.py [--requests 20]
+
+Exits with status 1 if any check fails.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Offline: no real credentials are used, but the clients need a key to construct
+os.environ.setdefault("GOOGLE_API_KEY", "offline-check")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.rag import pipeline, retrieval  # noqa: E402
+from app.tts import polly  # noqa: E402
+from app.utils import resilience  # noqa: E402
+from app.utils.timer import logger as timer_logger  # noqa: E402
+
+FAKE_DIMENSIONS = 8
+ANSWER = "I built a 3D portfolio with React Three Fiber. It talks back, too."
+
+
+class FaultyLLM:
+    """Chat model stand-in with configurable latency and failures."""
+
+    def __init__(self):
+        self.latency = lambda: 0.02
+        self.error_rate = 0.0
+        self.calls = 0
+
+    async def _respond(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency())
+        if random.random() < self.error_rate:
+            raise RuntimeError("503 model overloaded")
+
+    async def ainvoke(self, prompt):
+        await self._respond()
+        return AIMessage(content=ANSWER, usage_metadata={
+            "input_tokens": len(prompt) // 4, "output_tokens": 20, "total_tokens": 0
+        })
+
+    async def astream(self, prompt):
+        await self._respond()
+        for word in ANSWER.split(" "):
+            yield AIMessageChunk(content=word + " ")
+
+
+class FaultyPolly:
+    """boto3 Polly client stand-in with configurable latency and failures."""
+
+    def __init__(self):
+        self.latency = 0.01
+        self.error_rate = 0.0
+        self.calls = 0
+
+    def synthesize_speech(self, **kwargs):
+        import io
+        self.calls += 1
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            raise RuntimeError("ThrottlingException")
+        if kwargs["OutputFormat"] == "json":
+            return {"AudioStream": io.BytesIO(b'{"time":0,"type":"viseme","value":"p"}')}
+        return {"AudioStream": io.BytesIO(b"\xff\xf3\x64\xc4" + b"\0" * 140)}
+
+
+class FakeVectorStore:
+    """Vector store returning one relevant chunk."""
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k):
+        return [(Document(page_content="Projects: 3D portfolio."), 0.2)]
+
+
+class FakeClock:
+    """Manually advanced clock for breaker state checks."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def reset_breakers():
+    resilience._breakers.clear()
+    resilience._hedge_stats.clear()
+
+
+def check(results: list, name: str, passed: bool, detail: str = ""):
+    results.append(passed)
+    print(f"  {'✅' if passed else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+
+def scenario_breaker(results: list):
+    print("\nbreaker: state machine with an injected clock")
+    clock = FakeClock()
+    breaker = resilience.CircuitBreaker(
+        "fake", slow_call_seconds=1.0, window=10, min_calls=4,
+        failure_rate=0.5, slow_call_rate=0.5, open_seconds=30, clock=clock
+    )
+    for failed in (False, True, False, True):
+        breaker.record(0.1, failed=failed)
+    check(results, "opens at 50% errors", breaker.state == resilience.OPEN)
+    check(results, "rejects while open", not breaker.allow_request())
+
+    clock.now = 31
+    check(results, "half-open after cool-down", breaker.state == resilience.HALF_OPEN)
+    check(results, "lets one probe through", breaker.allow_request() and not breaker.allow_request())
+    breaker.record(0.1, failed=False)
+    check(results, "closes after a good probe", breaker.state == resilience.CLOSED)
+
+    for _ in range(4):
+        breaker.record(2.0, failed=False)
+    check(results, "opens on slow calls", breaker.state == resilience.OPEN)
+    clock.now = 62
+    breaker.allow_request()
+    breaker.record(2.0, failed=False)
+    check(results, "re-opens after a slow probe", breaker.state == resilience.OPEN)
+
+
+def timed_chats(client: TestClient, count: int, tag: str) -> list:
+    """Send chats and return (seconds, status, json) per request."""
+    responses = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = client.post("/api/chat", json={
+            "message": "What projects have you built recently?",
+            "session_id": f"{tag}-{i}",
+        })
+        responses.append((time.perf_counter() - start, response.status_code, response.json()))
+    return responses
+
+
+def scenario_polly_hang(results: list, client: TestClient, fake_polly: FaultyPolly, count: int):
+    print("\npolly-hang: Polly takes 2s, deadline 0.3s")
+    reset_breakers()
+    settings = polly.settings
+    fake_polly.latency = 2.0
+    deadline = 0.3
+    polly_timeout, settings.polly_timeout = settings.polly_timeout, deadline
+
+    responses = timed_chats(client, count, "polly")
+    fake_polly.latency = 0.01
+    settings.polly_timeout = polly_timeout
+
+    check(results, "every answer is 200 with text", all(r[1] == 200 and r[2]["text"] for r in responses))
+    check(results, "answers are text-only", all(r[2]["audio_base64"] is None for r in responses))
+    slowest = max(r[0] for r in responses)
+    check(results, "no request waits for Polly", slowest < 1.0, f"slowest {slowest * 1000:.0f}ms")
+    after_trip = [r[0] for r in responses[settings.breaker_min_calls:]]
+    fastest = min(after_trip)
+    check(results, "breaker answers without waiting once open",
+          fastest < deadline / 2, f"fastest {fastest * 1000:.0f}ms")
+    check(results, "Polly breaker is open",
+          resilience.get_breaker(polly.POLLY_UPSTREAM).state == resilience.OPEN)
+
+
+def scenario_llm_down(results: list, client: TestClient, fake_llm: FaultyLLM, count: int):
+    print("\nllm-down: every Gemini call fails")
+    reset_breakers()
+    fake_llm.error_rate = 1.0
+    fake_llm.calls = 0
+
+    responses = timed_chats(client, count, "llm")
+    fake_llm.error_rate = 0.0
+
+    from app.prompts.intents import INTENT_RESPONSES
+    check(results, "every answer is 200", all(r[1] == 200 for r in responses))
+    check(results, "answers use the fallback template",
+          all(r[2]["text"] == INTENT_RESPONSES["unavailable"] for r in responses))
+    # Primary and fast model breakers each need min_calls failures to open
+    max_calls = 2 * pipeline.settings.breaker_min_calls
+    check(results, "LLM stops being called once breakers open",
+          fake_llm.calls <= max_calls, f"{fake_llm.calls} calls for {count} requests")
+
+
+async def scenario_hedging(results: list, fake_llm: FaultyLLM, count: int):
+    print("\nhedging: 10% of LLM calls take 1s, the rest 30ms")
+    settings = pipeline.settings
+    rng = random.Random(0)
+    fake_llm.latency = lambda: 1.0 if rng.random() < 0.1 else 0.03
+    route = pipeline.select_route("What projects have you built recently?", [0.9])
+
+    async def p95(hedge_delay_ms: int) -> float:
+        reset_breakers()
+        settings.llm_hedge_delay_ms = hedge_delay_ms
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            await pipeline.generate_answer("prompt", route)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        return latencies[int(len(latencies) * 0.95)]
+
+    without = await p95(0)
+    with_hedge = await p95(100)
+    fake_llm.latency = lambda: 0.02
+    print(f"  p95 without hedging {without * 1000:.0f}ms, with hedging after 100ms {with_hedge * 1000:.0f}ms")
+    check(results, "hedging cuts the tail", with_hedge < without / 2)
+
+
+def main(args) -> int:
+    random.seed(0)
+    timer_logger.setLevel(logging.WARNING)
+
+    fake_llm = FaultyLLM()
+    fake_polly = FaultyPolly()
+    pipeline.get_llm = lambda route: fake_llm
+    pipeline.vectorstore = FakeVectorStore()
+    polly.polly_client = fake_polly
+    pipeline.settings.answer_bank_dir = str(Path(__file__).parent / "no-answer-bank")
+    pipeline.settings.rate_limit_per_day = 10_000
+
+    async def embed_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"embedding": {"values": [0.1] * FAKE_DIMENSIONS}})
+
+    results = []
+    scenario_breaker(results)
+    with TestClient(app) as client:
+        retrieval._http_client = httpx.AsyncClient(
+            base_url=retrieval.GEMINI_API_URL,
+            transport=httpx.MockTransport(embed_handler)
+        )
+        scenario_polly_hang(results, client, fake_polly, args.requests)
+        scenario_llm_down(results, client, fake_llm, args.requests)
+        client.portal.call(scenario_hedging, results, fake_llm, args.requests * 5)
+
+    if not all(results):
+        print(f"\n❌ {results.count(False)} check(s) failed")
+        return 1
+    print(f"\n✅ All {len(results)} checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20)
+    sys.exit(main(parser.parse_args()))
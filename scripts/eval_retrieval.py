@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval evaluation over the knowledge base.
+
+Rebuilds a throwaway index from knowledge/ with the same loader and
+`split_documents` as ingestion, runs every question in the golden set
+through the same vector search the chat endpoint uses, and scores the
+retrieved chunks against the files each question is expected to come from:
+
+  recall@k  share of a question's expected files found in its top k chunks
+  mrr       1 / rank of the first chunk from an expected file (0 if none)
+
+It also reports the index size and per-query search latency, and writes
+everything to a JSON report with stable key order so runs can be diffed.
+
+Embeddings (no network unless asked):
+  hashing   deterministic hashed bag-of-words vectors; a lexical baseline
+            that still shows the effect of chunking and k
+  cached    real Gemini embeddings read from --cache. Populate or update the
+            cache once with --refresh-cache (needs GOOGLE_API_KEY); runs
+            with a missing entry fail instead of calling the API
+
+Usage:
+  python scripts/eval_retrieval.py [--embeddings hashing|cached] [--k 5]
+      [--output retrieval_report.json] [--baseline old_report.json]
+
+With --baseline, exits with status 1 if recall@k or MRR dropped by more
+than --tolerance.
+"""
+import re
+import sys
+import json
+import math
+import time
+import asyncio
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import chromadb  # noqa: E402
+from chromadb.config import Settings as ChromaSettings  # noqa: E402
+from langchain_chroma import Chroma  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from app.rag.ingest import KNOWLEDGE_DIR, load_documents, split_documents, knowledge_fingerprint  # noqa: E402
+from app.rag.retrieval import EMBEDDING_MODEL, RETRIEVAL_K, asearch  # noqa: E402
+
+GOLDEN_FILE = Path(__file__).parent / "retrieval_golden.jsonl"
+CACHE_FILE = Path(__file__).parent.parent / "eval_cache" / "embeddings.json"
+
+HASHING_DIMENSIONS = 1024
+TOKEN = re.compile(r"[a-z0-9][a-z0-9.+#-]*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can did do does for from have how i in is it "
+    "me my of on or so that the this to was what when where which who why with "
+    "you your".split()
+)
+
+
+class HashingEmbeddings(Embeddings):
+    """Hashed bag of words and word pairs, L2 normalized. Fully offline."""
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _tokens(self, text: str) -> List[str]:
+        words = [word.rstrip(".-").removesuffix("s") for word in TOKEN.findall(text.lower())]
+        words = [word for word in words if word and word not in STOPWORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in self._tokens(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "big") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Gemini embeddings served from a JSON file keyed by task and text hash.
+    Only calls the API (and updates the file) when refresh is set.
+    """
+
+    def __init__(self, cache_file: Path, refresh: bool = False):
+        self.cache_file = cache_file
+        self.refresh = refresh
+        self.cache: Dict[str, List[float]] = (
+            json.loads(cache_file.read_text(encoding="utf-8")) if cache_file.exists() else {}
+        )
+        self._client = None
+
+    @staticmethod
+    def _key(task: str, text: str) -> str:
+        return hashlib.sha256(f"{EMBEDDING_MODEL}\n{task}\n{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, task: str, texts: List[str], embed) -> List[List[float]]:
+        missing = [text for text in texts if self._key(task, text) not in self.cache]
+        if missing:
+            if not self.refresh:
+                raise SystemExit(
+                    f"{len(missing)} {task} embeddings are not in {self.cache_file}; "
+                    f"run once with --refresh-cache"
+                )
+            for text, vector in zip(missing, embed(missing)):
+                self.cache[self._key(task, text)] = vector
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_file.write_text(json.dumps(self.cache), encoding="utf-8")
+        return [self.cache[self._key(task, text)] for text in texts]
+
+    def _gemini(self):
+        if self._client is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            from app.config import get_settings
+            self._client = GoogleGenerativeAIEmbeddings(
+                model=EMBEDDING_MODEL,
+                google_api_key=get_settings().google_api_key
+            )
+        return self._client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._lookup("document", texts, lambda batch: self._gemini().embed_documents(batch))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._lookup("query", [text], lambda batch: [self._gemini().embed_query(batch[0])])[0]
+
+
+def load_golden_set(path: Path) -> List[dict]:
+    """Read golden questions, one JSON object per line."""
+    questions = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            questions.append(json.loads(line))
+    return questions
+
+
+def relative_source(source: str, knowledge_dir: Path) -> str:
+    """Chunk source path relative to the knowledge directory, as in the golden set."""
+    try:
+        return Path(source).resolve().relative_to(knowledge_dir.resolve()).as_posix()
+    except ValueError:
+        return source
+
+
+def directory_bytes(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def score(ranked: List[str], expected: List[str], cutoffs: List[int]) -> dict:
+    """recall@k for each cutoff and reciprocal rank of the first expected file."""
+    result = {}
+    for k in cutoffs:
+        found = set(ranked[:k]) & set(expected)
+        result[f"recall@{k}"] = round(len(found) / len(expected), 4)
+    first_hit = next((rank for rank, source in enumerate(ranked, 1) if source in expected), None)
+    result["first_hit_rank"] = first_hit
+    result["reciprocal_rank"] = round(1 / first_hit, 4) if first_hit else 0.0
+    return result
+
+
+async def evaluate(args, embedding: Embeddings, index_dir: Path) -> dict:
+    """Build the index, run the golden set and assemble the report."""
+    knowledge_dir = Path(args.knowledge_dir)
+    golden = load_golden_set(Path(args.golden))
+    cutoffs = sorted({k for k in (1, 3, args.k) if k <= args.k})
+
+    documents = load_documents(knowledge_dir)
+    chunks = split_documents(documents)
+
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(
+        path=str(index_dir),
+        settings=ChromaSettings(anonymized_telemetry=False)
+    )
+    vectorstore = Chroma.from_documents(
+        documents=chunks,
+        embedding=embedding,
+        client=client,
+        collection_name="retrieval-eval"
+    )
+    build_seconds = time.perf_counter() - start
+    dimensions = len(embedding.embed_query("dimension probe"))
+
+    queries, latencies = [], []
+    for item in golden:
+        vector = embedding.embed_query(item["question"])
+        # Same executor-backed search as the chat endpoint; repeated for stable timings
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = await asearch(vectorstore, vector, args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        # Sparse hashing vectors give many chunks a similarity of 0 (up to float error) and
+        # Chroma returns an arbitrary subset of them; they share no terms with
+        # the question, so count them as misses. Remaining ties are ordered by
+        # source and text so reports diff cleanly
+        results = [result for result in results if result[1] > 1e-6]
+        results.sort(key=lambda r: (-round(r[1], 6), r[0].metadata.get("source", ""), r[0].page_content))
+        ranked = [relative_source(doc.metadata.get("source", ""), knowledge_dir) for doc, _ in results]
+        queries.append({
+            "question": item["question"],
+            "expected": item["sources"],
+            "retrieved": ranked,
+            **score(ranked, item["sources"], cutoffs),
+        })
+
+    metrics = {
+        f"recall@{k}": round(sum(q[f"recall@{k}"] for q in queries) / len(queries), 4)
+        for k in cutoffs
+    }
+    metrics["mrr"] = round(sum(q["reciprocal_rank"] for q in queries) / len(queries), 4)
+    metrics["missed"] = sum(1 for q in queries if q["first_hit_rank"] is None)
+
+    return {
+        "config": {
+            "embeddings": args.embeddings,
+            "embedding_model": EMBEDDING_MODEL if args.embeddings == "cached" else f"hashing-{HASHING_DIMENSIONS}",
+            "k": args.k,
+            "golden_set": Path(args.golden).name,
+            "questions": len(golden),
+            "knowledge_fingerprint": knowledge_fingerprint(knowledge_dir),
+        },
+        "index": {
+            "documents": len(documents),
+            "chunks": len(chunks),
+            "mean_chunk_chars": round(sum(len(c.page_content) for c in chunks) / max(len(chunks), 1), 1),
+            "dimensions": dimensions,
+            "vector_bytes": len(chunks) * dimensions * 4,
+            "disk_bytes": directory_bytes(index_dir),
+            "build_seconds": round(build_seconds, 3),
+        },
+        "metrics": metrics,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "max": round(max(latencies), 3),
+            "samples": len(latencies),
+        },
+        "queries": queries,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> int:
+    """Print metric deltas against a previous report; 1 if quality regressed."""
+    print(f"\nAgainst baseline ({baseline['config'].get('embeddings')}, k={baseline['config'].get('k')}):")
+    regressed = False
+    for name, value in report["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None:
+            continue
+        delta = value - old
+        # Fewer misses is better; every other metric is higher-is-better
+        worse = delta > 0 if name == "missed" else delta < -tolerance
+        regressed |= worse and name != "missed"
+        print(f"  {name:<10}{old:>8}  ->{value:>8}  ({delta:+.4f}){'  REGRESSED' if worse else ''}")
+
+    for name in ("p50", "p95"):
+        old, new = baseline["latency_ms"][name], report["latency_ms"][name]
+        print(f"  {name + ' ms':<10}{old:>8}  ->{new:>8}")
+    for name in ("chunks", "disk_bytes"):
+        old, new = baseline["index"][name], report["index"][name]
+        print(f"  {name:<10}{old:>8}  ->{new:>8}")
+
+    old_ranks = {q["question"]: q["first_hit_rank"] for q in baseline.get("queries", [])}
+    for query in report["queries"]:
+        old_rank = old_ranks.get(query["question"], query["first_hit_rank"])
+        if old_rank != query["first_hit_rank"]:
+            print(f"  rank {old_rank} -> {query['first_hit_rank']}: {query['question']}")
+    return 1 if regressed else 0
+
+
+def main(args) -> int:
+    if args.embeddings == "cached":
+        embedding = CachedEmbeddings(Path(args.cache), refresh=args.refresh_cache)
+    else:
+        embedding = HashingEmbeddings()
+
+    with tempfile.TemporaryDirectory(prefix="retrieval-eval-") as index_dir:
+        report = asyncio.run(evaluate(args, embedding, Path(index_dir)))
+
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    index, metrics, latency = report["index"], report["metrics"], report["latency_ms"]
+    print(f"{report['config']['questions']} questions, {index['chunks']} chunks, "
+          f"{index['dimensions']} dims, {index['disk_bytes'] / 1024:.0f} KB on disk")
+    print("  ".join(f"{name} {value}" for name, value in metrics.items()))
+    print(f"search latency p50 {latency['p50']} ms, p95 {latency['p95']} ms")
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        return compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", choices=["hashing", "cached"], default="hashing")
+    parser.add_argument("--cache", default=str(CACHE_FILE), help="Embedding cache for --embeddings cached")
+    parser.add_argument("--refresh-cache", action="store_true", help="Fetch missing embeddings from Gemini")
+    parser.add_argument("--k", type=int, default=RETRIEVAL_K, help="Chunks retrieved per question")
+    parser.add_argument("--golden", default=str(GOLDEN_FILE))
+    parser.add_argument("--knowledge-dir", default=str(KNOWLEDGE_DIR))
+    parser.add_argument("--repeat", type=int, default=5, help="Timed searches per question")
+    parser.add_argument("--output", default="retrieval_report.json")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Allowed metric drop vs baseline")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Print a waterfall view of traced chat requests.
+
+Reads the JSON-lines span file written with TRACING_EXPORTER=file and
+draws each trace as an indented span tree with timing bars, so overlap
+(e.g. the two parallel Polly calls) is visible. Spans on the critical
+path - the chain of children that finish last and so determine the
+request's end time - are marked with "*".
+
+Usage:
+  python scripts/trace_waterfall.py [traces.jsonl] [--last 5] [--slowest N] [--trace-id ID]
+"""
+import sys
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+BAR_WIDTH = 40
+
+
+def load_traces(path: Path) -> dict:
+    """Group spans by trace id."""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def critical_path(span_id: str, children: dict, spans_by_id: dict) -> set:
+    """Follow the last-finishing child from a span down to a leaf."""
+    path = {span_id}
+    while children.get(span_id):
+        span_id = max(children[span_id], key=lambda child: spans_by_id[child]["end_ns"])
+        path.add(span_id)
+    return path
+
+
+def format_attributes(attributes: dict) -> str:
+    """Render span attributes compactly."""
+    if not attributes:
+        return ""
+    return " " + " ".join(f"{key}={value}" for key, value in attributes.items())
+
+
+def print_trace(spans: list):
+    """Print one trace as a waterfall."""
+    spans_by_id = {span["span_id"]: span for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in sorted(spans, key=lambda s: s["start_ns"]):
+        if span["parent_id"] in spans_by_id:
+            children[span["parent_id"]].append(span["span_id"])
+        else:
+            roots.append(span["span_id"])
+
+    start = min(span["start_ns"] for span in spans)
+    end = max(span["end_ns"] for span in spans)
+    total = max(end - start, 1)
+
+    critical = set()
+    for root in roots:
+        critical |= critical_path(root, children, spans_by_id)
+
+    print(f"\nTrace {spans[0]['trace_id']}  ({total / 1e6:.1f} ms, {len(spans)} spans)")
+
+    def walk(span_id: str, depth: int):
+        span = spans_by_id[span_id]
+        offset = int((span["start_ns"] - start) / total * BAR_WIDTH)
+        width = max(1, int((span["end_ns"] - span["start_ns"]) / total * BAR_WIDTH))
+        bar = " " * offset + "█" * min(width, BAR_WIDTH - offset)
+        marker = "*" if span_id in critical else " "
+        label = ("  " * depth + span["name"])[:44]
+        duration = (span["end_ns"] - span["start_ns"]) / 1e6
+        status = "" if span["status"] != "ERROR" else " [ERROR]"
+        print(f"{marker} {label:<44} |{bar:<{BAR_WIDTH}}| {duration:>8.1f} ms"
+              f"{status}{format_attributes(span['attributes'])}")
+        for child in children[span_id]:
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+
+
+def main(args) -> int:
+    path = Path(args.file)
+    if not path.exists():
+        print(f"No trace file at {path}. Run the API with TRACING_EXPORTER=file first.")
+        return 1
+
+    traces = load_traces(path)
+    if args.trace_id:
+        selected = [traces[args.trace_id]] if args.trace_id in traces else []
+    elif args.slowest:
+        duration = lambda spans: max(s["end_ns"] for s in spans) - min(s["start_ns"] for s in spans)
+        selected = sorted(traces.values(), key=duration, reverse=True)[:args.slowest]
+    else:
+        by_start = sorted(traces.values(), key=lambda spans: min(s["start_ns"] for s in spans))
+        selected = by_start[-args.last:]
+
+    if not selected:
+        print("No matching traces.")
+        return 1
+
+    for spans in selected:
+        print_trace(spans)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("file", nargs="?", default="traces.jsonl")
+    parser.add_argument("--last", type=int, default=5, help="Show the N most recent traces")
+    parser.add_argument("--slowest", type=int, help="Show the N slowest traces instead")
+    parser.add_argument("--trace-id", help="Show a single trace")
+    sys.exit(main(parser.parse_args()))
@@ -13,6 +13,16 @@ if [ ! -d "chroma_db" ] || [ -z "$(ls -A chroma_db)" ]; then
     
     echo "Ingesting knowledge..."
     python -m app.rag.ingest
+    
+    echo "Building answer bank..."
+    python -m app.rag.answer_bank || echo "⚠️  Answer bank build failed, continuing without it."
+    
+    for dir in personas/*/; do
+        if [ -f "$dir/persona.json" ]; then
+            echo "Ingesting persona $(basename "$dir")..."
+            python -m app.rag.ingest "$(basename "$dir")" || echo "⚠️  Ingestion failed for $dir, skipping."
+        fi
+    done
 else
     echo "✅ Knowledge base found (ingested at build time)."
 fi